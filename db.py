@@ -418,5 +418,15 @@ def filter_group(group: list[Any], key: str | None, value, include=True) -> list
     return filtered
 
 
+def group_by(group: list[Any], key: str) -> dict[Any, list[Any]]:
+    """Bucket `group` by `key` in one pass (objects missing the key are skipped)."""
+    grouped: dict[Any, list[Any]] = {}
+    for obj in group:
+        _obj = asdict(obj) if isinstance(obj, AppObject) else obj
+        if key in _obj.keys():
+            grouped.setdefault(_obj[key], []).append(obj)
+    return grouped
+
+
 if __name__ == "__main__":
     test_encryption()
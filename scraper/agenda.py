@@ -1,20 +1,19 @@
 import argparse
 import asyncio
-import json
 import queue
 from typing import Literal
 
+import orjson
 from db import filter_group
 from dotenv import load_dotenv
-from playwright.async_api import async_playwright, BrowserContext
+from playwright.async_api import async_playwright, Browser
 
-from scraper.portals.utils import get_portal_key_from_url
-from scraper.runner import db_conn, get_portal, get_students_from_db
+from scraper.portals.utils import block_resources, get_portal_key_from_url
+from scraper.runner import SCRAPE_CONCURRENCY, db_conn, get_portal, get_students_from_db
 
 load_dotenv()
-async def fetch_agenda(ctx: BrowserContext, student: dict, target: Literal["upcoming", "missing"]) -> tuple[dict, dict]: # maybe make this just a db id (int)
+async def fetch_agenda(browser: Browser, student: dict, target: Literal["upcoming", "missing"]) -> tuple[dict, dict]: # maybe make this just a db id (int)
     # logins for canvas and google classroom are stored in the alternate fields, unless the students main login is canvas
-    page = await ctx.new_page()
     if student["portal"] == 'canvas':
         login_url = student["login_url"]
         sid = student["id"]
@@ -28,21 +27,29 @@ async def fetch_agenda(ctx: BrowserContext, student: dict, target: Literal["upco
     assert portal in ("canvas", "google_classroom"), f"Portal {portal} not supported for agenda collection"
     
     Engine = get_portal(portal)
-    scraper = Engine(
-        page,
-        sid,
-        password,
-        alt_student_id=student["alt_id"],
-        alt_password=student["alt_password"],
-        login_url=login_url,
-        alt_portal_url=student.get("alt_login_url"),
-        student_name=student.get("student_name"),
-    )
-
-    # Only GPS uses pictograph answers
-    if student.get("auth_images") and student["portal"] == "gps":
-        setattr(scraper, "auth_images", student["auth_images"])
+    # Each student gets their own context (cookies/storage) on the shared browser
+    ctx = await browser.new_context()
+    # Everything after new_context() is inside the try so a failure can't leak the context
     try:
+        ctx.set_default_timeout(5_000)
+        ctx.set_default_navigation_timeout(5_000)
+        await block_resources(ctx, Engine.BLOCKED_RESOURCES)
+        page = await ctx.new_page()
+        scraper = Engine(
+            page,
+            sid,
+            password,
+            alt_student_id=student["alt_id"],
+            alt_password=student["alt_password"],
+            login_url=login_url,
+            alt_portal_url=student.get("alt_login_url"),
+            student_name=student.get("student_name"),
+        )
+
+        # Only GPS uses pictograph answers
+        if student.get("auth_images") and student["portal"] == "gps":
+            setattr(scraper, "auth_images", student["auth_images"])
+
         print(f"Starting login for {student['id']}", flush=True)
         try:
             await scraper.login(first_name=student.get("student_name"))
@@ -51,7 +58,8 @@ async def fetch_agenda(ctx: BrowserContext, student: dict, target: Literal["upco
         except Exception:
             return {}, student
     finally:
-        await page.close()
+        # Closing the context closes its page too
+        await ctx.close()
 
 
 async def main(
@@ -77,12 +85,14 @@ async def main(
             "--disable-blink-features=AutomationControlled",
         ]
         browser = await pw.chromium.launch(headless=False, args=browser_args)
-        context = await browser.new_context()
-        context.set_default_timeout(5_000)
-        context.set_default_navigation_timeout(5_000)
-        
+        sem = asyncio.Semaphore(SCRAPE_CONCURRENCY)
+
+        async def run_one(student: dict) -> tuple[dict, dict]:
+            async with sem:
+                return await fetch_agenda(browser, student, target)
+
         tasks = {
-            asyncio.create_task(fetch_agenda(context, student, target)): student
+            asyncio.create_task(run_one(student)): student
             for student in students
         }
 
@@ -98,7 +108,7 @@ async def main(
             with db_conn() as conn: # add the agenda to the student in the database
                 conn.exec_driver_sql(
                     "UPDATE Student SET weekly_agenda = %s WHERE ID = %s",
-                    (json.dumps(agenda), student["db_id"]),
+                    (orjson.dumps(agenda).decode(), student["db_id"]),
                 )
                 conn.commit()
             print(f"Agenda saved for student {student['student_name']}")
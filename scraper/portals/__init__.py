@@ -31,8 +31,12 @@ def get_portal(key: str) -> Type[PortalEngine]:
     """Return the engine class previously registered under `key`."""
     if not key or not isinstance(key, str):
         raise ValueError(f"Invalid or missing portal key: {key!r}")
+    name = key.lower()
+    if name not in _REGISTRY and name in managed_portals:
+        # Importing the engine module runs its @register_portal decorator.
+        importlib.import_module(f".{name}", __name__)
     try:
-        return _REGISTRY[key.lower()]
+        return _REGISTRY[name]
     except KeyError:
         raise ValueError(f"No portal engine registered for '{key}'") from None
 
@@ -63,9 +67,8 @@ managed_portals: Dict[str, list[str]] = {
     "schooltool": ["schooltool"],
     "asuprep": ["global.asuprep"],
    }
-# Import engines so they register. NOTE: The managed portal should match the .py file name that manages it
-for portal in managed_portals.keys():
-    importlib.import_module(f".{portal}", __name__)
+# Engines are imported lazily by get_portal() so a run only loads the portals it uses.
+# NOTE: The managed portal should match the .py file name that manages it
 
 
 # ---------------------------
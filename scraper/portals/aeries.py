@@ -1,14 +1,37 @@
 from __future__ import annotations
 
+import logging
 from time import monotonic
 from typing import Any, Dict, Optional
 
-from bs4 import Tag
-
 from . import register_portal
 from .base import PortalEngine
-from .utils import exists, wait_after_nav, universal_login_flow, grades_table_to_dict, canonicalize_course_title, canonicalize_grade, PlaywrightTimeout
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from .utils import exists, wait_after_nav, universal_login_flow, grades_table_to_dict, canonicalize_course_title, canonicalize_grade, start_tracing, stop_tracing, PlaywrightTimeout
+from tenacity import retry, stop_after_attempt, wait_exponential, wait_random, retry_if_exception_type
+
+logger = logging.getLogger(__name__)
+
+_LOGGED_IN_CSS = ", ".join((
+    "#StudentNameDropDown",
+    "#NavMainGrades",
+    "#divClass",
+    "a[href*='Dashboard']",
+    "a[href*='Grades']",
+))
+_LOGIN_ERROR_CSS = ".alert, .validation-summary-errors, #divError"
+
+# [course, grade] text per dashboard class card, or null when #divClass is absent
+_DASHBOARD_CARDS_JS = """
+() => {
+  const table = document.querySelector('#divClass');
+  if (!table) return null;
+  return Array.from(table.querySelectorAll('div.Card')).map(card => {
+    const link = card.querySelector('a.TextHeading');
+    const span = card.querySelector('div.Grade span');
+    return [link ? link.textContent.trim() : '', span ? span.textContent.trim() : ''];
+  });
+}
+"""
 
 
 @register_portal("aeries")
@@ -16,40 +39,26 @@ class Aeries(PortalEngine):
     async def _is_logged_in(self) -> bool:
         url = self.page.url or ""
 
-        success_selectors = [
-            "#StudentNameDropDown",
-            "#NavMainGrades",
-            "#divClass",
-            "a[href*='Dashboard']",
-            "a[href*='Grades']",
-        ]
-
-        for sel in success_selectors:
-            try:
-                if await exists(self.page.locator(sel), timeout=700):
-                    return True
-            except Exception:
-                pass
+        # One union probe instead of a 700ms probe per selector; visible=true so a
+        # hidden match earlier in the DOM can't mask a visible one
+        try:
+            if await exists(self.page.locator(_LOGGED_IN_CSS).locator("visible=true").first, timeout=700):
+                return True
+        except Exception:
+            pass
 
         return any(x in url.lower() for x in ("dashboard", "grades", "student"))
 
     async def _has_login_error(self) -> bool:
-        error_targets = [
-            self.page.get_by_role("alert"),
-            self.page.locator(".alert"),
-            self.page.locator(".validation-summary-errors"),
-            self.page.locator("#divError"),
-            self.page.locator("text=/invalid|incorrect|failed|try again|username|password/i"),
-        ]
-
-        for target in error_targets:
-            try:
-                if await exists(target, timeout=700):
-                    return True
-            except Exception:
-                pass
-
-        return False
+        error_target = (
+            self.page.get_by_role("alert")
+            .or_(self.page.locator(_LOGIN_ERROR_CSS))
+            .or_(self.page.locator("text=/invalid|incorrect|failed|try again|username|password/i"))
+        )
+        try:
+            return await exists(error_target.locator("visible=true").first, timeout=700)
+        except Exception:
+            return False
 
     async def _wait_for_login_result(self, timeout_ms: int = 12000) -> bool:
         deadline = monotonic() + (timeout_ms / 1000)
@@ -72,11 +81,12 @@ class Aeries(PortalEngine):
 
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
+        wait=wait_exponential(multiplier=1, min=4, max=10) + wait_random(0, 1),
         retry=retry_if_exception_type(PlaywrightTimeout),
         reraise=True,
     )
     async def login(self, first_name: Optional[str] = None) -> None:
+        await start_tracing(self.page)
         try:
             username_selector = "input#portalAccountUsername"
             password_selector = "input#portalAccountPassword"
@@ -113,11 +123,10 @@ class Aeries(PortalEngine):
             # """, exact=False)):
             #     raise self.LoginError("Invalid credentials")
         except Exception as e:
-            print(e)
+            logger.warning("login failed for %s: %s", self.sid, e)
             raise
         finally:
-            await self.page.context.tracing.stop()
-            print("stopped tracing")
+            await stop_tracing(self.page, f"aeries-login-{self.sid}")
 
     async def iusd_login(self):
         username_selector = "#input28"
@@ -144,22 +153,28 @@ class Aeries(PortalEngine):
 
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
+        wait=wait_exponential(multiplier=1, min=4, max=10) + wait_random(0, 1),
         retry=retry_if_exception_type(PlaywrightTimeout),
     )
     async def fetch_grades(self) -> Dict[str, Any]:
-        print("\nfetching grades")
+        logger.debug("fetching grades for %s", self.sid)
         try:
             await self.raise_login_error_if("Dashboard" not in self.page.url)
-            await self.page.wait_for_timeout(3000)
+            # No #divClass means a student still has to be picked (handled below), so
+            # neither wait is fatal. Cards render late inside #divClass, but an empty
+            # dashboard only pays the short card wait.
+            try:
+                await self.page.locator("#divClass").wait_for(state="attached", timeout=10000)
+                await self.page.locator("#divClass div.Card").first.wait_for(timeout=3000)
+            except PlaywrightTimeout:
+                pass
 
-            soup = await self.get_soup()
-            class_table = soup.find("div", id="divClass")
-            if class_table is None:
+            class_cards = await self.page.evaluate(_DASHBOARD_CARDS_JS)
+            if class_cards is None:
                 await self.page.click("#StudentNameDropDown")
                 await self.page.click("#StudentNameDropDownMenu")
                 await self.page.wait_for_load_state()
-                await self.page.wait_for_timeout(3000)
+                await self.page.locator("#NavMainGrades").wait_for(timeout=15000)
 
             grades_page_exists = await self.nav_to_grades()
             if grades_page_exists:
@@ -174,44 +189,28 @@ class Aeries(PortalEngine):
                     grade_selector,
                     decompose_labels=True,
                 )
-                print(f"[AERIES] parsed {len(courses_dict)}: {courses_dict}")
+                logger.debug("parsed %d: %s", len(courses_dict), courses_dict)
                 return {"parsed_grades": courses_dict}
             else:
-                print("grades tab DNE, parsing grades from dashboard")
+                logger.debug("grades tab DNE, parsing grades from dashboard")
                 await self.page.reload()
                 courses_dict = {}
 
-                if isinstance(class_table, Tag) and len(class_table.select("div.Card")) > 0:
-                    class_cards = class_table.select("div.Card")
-                    print(f"[AERIES] found {len(class_cards)}")
-                    for card in class_cards:
-                        class_link = card.find("a", class_="TextHeading")
-                        if class_link is None: 
-                            continue
-                        course_name: str = class_link.text.strip()
-
-                        grade_div = card.find("div", class_="Grade")
-                        if not isinstance(grade_div, Tag):
-                            continue
-                        grade_span = grade_div.find("span")
-                        if grade_span is None:
-                            continue
-                        grade_str: str | None = grade_span.text.strip() if grade_span is not None else None
-                        if not grade_str:
+                if class_cards:
+                    logger.debug("found %d class cards", len(class_cards))
+                    for course_name, grade_str in class_cards:
+                        if not course_name or not grade_str:
                             continue
                         title = canonicalize_course_title(course_name)
                         grade = canonicalize_grade(grade_str)
                         courses_dict[title] = grade
 
-                import pprint
-                pprint.pprint(courses_dict)
+                logger.debug("parsed %d: %s", len(courses_dict), courses_dict)
                 return courses_dict
 
         except Exception as e:
-            print(e)
+            logger.warning("fetch_grades failed for %s: %s", self.sid, e)
             raise
-        finally:
-            await self.page.context.tracing.stop()
 
     async def logout(self) -> None:
         await self.page.wait_for_timeout(500)
\ No newline at end of file
@@ -6,13 +6,14 @@ from typing import Any, Dict
 from bs4 import BeautifulSoup, Tag
 
 from . import LoginError, register_portal
-from .base import PortalEngine, PlaywrightTimeout
+from .base import HTML_PARSER, PortalEngine, PlaywrightTimeout
 from .utils import canonicalize_course_title, canonicalize_grade
 
 
 ALLEN_START_URL = "https://portal.allenisd.org/"
 ALLEN_SKYWARD_APP_NAME = "Skyward Student"
 _RAPIDIDENTITY_PORTAL_PATH = "/p/portal"
+_RAPIDIDENTITY_PORTAL_RE = re.compile(re.escape(_RAPIDIDENTITY_PORTAL_PATH))
 
 _BLOCKER_PATTERNS: tuple[tuple[str, re.Pattern[str]], ...] = (
     ("mfa", re.compile(r"\b(mfa|multi[- ]factor|verification code|one[- ]time|authenticator|approve sign[- ]in)\b", re.I)),
@@ -25,6 +26,7 @@ _BLOCKER_PATTERNS: tuple[tuple[str, re.Pattern[str]], ...] = (
 _GRADE_VALUE_RE = re.compile(r"\b(1[0-4]\d(?:\.\d+)?|150(?:\.0+)?|100(?:\.0+)?|[1-9]?\d(?:\.\d+)?)\s*%?\b")
 _GRADE_LABEL_RE = re.compile(r"\b(current\s+grade|overall\s+grade|grade|average|avg)\b", re.I)
 _COURSE_HEADER_RE = re.compile(r"\b(course|class)\b", re.I)
+_COURSE_LABEL_PREFIX_RE = re.compile(r"^\s*(course|class)\s*:\s*", re.I)
 
 
 @register_portal("allenisd")
@@ -52,7 +54,7 @@ class AllenISD(PortalEngine):
         await self._press_focused_go_button()
 
         await self.page.wait_for_url(
-            lambda url: _RAPIDIDENTITY_PORTAL_PATH in url,
+            _RAPIDIDENTITY_PORTAL_RE,
             timeout=30_000,
             wait_until="domcontentloaded",
         )
@@ -80,7 +82,7 @@ class AllenISD(PortalEngine):
             await self.page.wait_for_timeout(1500)
 
         html = await self.page.content()
-        parsed = self.parse_gradebook_html(html)
+        parsed = await self.parse_off_loop(self.parse_gradebook_html, html)
         if not parsed:
             raise LoginError("AllenISD gradebook loaded but no course grades were parsed")
         return {"parsed_grades": parsed}
@@ -113,40 +115,39 @@ class AllenISD(PortalEngine):
 
     @classmethod
     def parse_gradebook_html(cls, html: str) -> Dict[str, float]:
-        soup = BeautifulSoup(html, "html.parser")
+        soup = BeautifulSoup(html, HTML_PARSER)
         for elem in soup.select("script, style, noscript"):
             elem.decompose()
 
         parsed: Dict[str, float] = {}
         for table in soup.select("table"):
-            cls._parse_header_table(table, parsed)
-            cls._parse_section_table(table, parsed)
-            cls._parse_generic_rows(table, parsed)
+            # Extract cell text once; all three passes read the same rows.
+            rows = [cls._row_cells(row) for row in table.select("tr")]
+            cls._parse_header_table(rows, parsed)
+            cls._parse_section_table(rows, parsed)
+            cls._parse_generic_rows(rows, parsed)
         return parsed
 
     @classmethod
-    def _parse_header_table(cls, table: Tag, parsed: Dict[str, float]) -> None:
-        rows = table.select("tr")
+    def _parse_header_table(cls, rows: list[list[str]], parsed: Dict[str, float]) -> None:
         if not rows:
             return
 
-        headers = cls._row_cells(rows[0])
+        headers = rows[0]
         course_idx = cls._first_matching_index(headers, _COURSE_HEADER_RE)
         grade_idx = cls._first_matching_index(headers, _GRADE_LABEL_RE)
         if course_idx is None or grade_idx is None:
             return
 
-        for row in rows[1:]:
-            cells = cls._row_cells(row)
+        for cells in rows[1:]:
             if len(cells) <= max(course_idx, grade_idx):
                 continue
             cls._add_grade(parsed, cells[course_idx], cells[grade_idx])
 
     @classmethod
-    def _parse_section_table(cls, table: Tag, parsed: Dict[str, float]) -> None:
+    def _parse_section_table(cls, rows: list[list[str]], parsed: Dict[str, float]) -> None:
         current_course: str | None = None
-        for row in table.select("tr"):
-            cells = cls._row_cells(row)
+        for cells in rows:
             if not cells:
                 continue
             if len(cells) == 1:
@@ -158,9 +159,8 @@ class AllenISD(PortalEngine):
                     parsed[current_course] = grade
 
     @classmethod
-    def _parse_generic_rows(cls, table: Tag, parsed: Dict[str, float]) -> None:
-        for row in table.select("tr"):
-            cells = cls._row_cells(row)
+    def _parse_generic_rows(cls, rows: list[list[str]], parsed: Dict[str, float]) -> None:
+        for cells in rows:
             if len(cells) < 2:
                 continue
             grade = cls._grade_from_cells(reversed(cells))
@@ -191,7 +191,7 @@ class AllenISD(PortalEngine):
 
     @staticmethod
     def _normalize_course(text: str) -> str | None:
-        text = re.sub(r"^\s*(course|class)\s*:\s*", "", text, flags=re.I)
+        text = _COURSE_LABEL_PREFIX_RE.sub("", text)
         text = " ".join(text.split()).strip()
         if not text or _GRADE_LABEL_RE.fullmatch(text) or _GRADE_VALUE_RE.fullmatch(text):
             return None
@@ -2,14 +2,14 @@ from __future__ import annotations
 from typing import Any, Dict, Optional
 from scraper.portals.base import PortalEngine, PlaywrightTimeout
 from scraper.portals import register_portal
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from tenacity import retry, stop_after_attempt, wait_exponential, wait_random, retry_if_exception_type
 
 from .utils import universal_login_flow, wait_after_nav, grades_table_to_dict
 @register_portal("asuprep")
 class ASUPrep(PortalEngine):
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
+        wait=wait_exponential(multiplier=1, min=2, max=10) + wait_random(0, 1),
         retry=retry_if_exception_type(PlaywrightTimeout),
     )
     async def login(self, first_name: Optional[str] = None) -> None:
@@ -39,7 +39,7 @@ class ASUPrep(PortalEngine):
 
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
+        wait=wait_exponential(multiplier=1, min=2, max=10) + wait_random(0, 1),
         retry=retry_if_exception_type(PlaywrightTimeout),
     )
     async def fetch_grades(self) -> Dict[str, Any]:
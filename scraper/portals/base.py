@@ -1,15 +1,42 @@
 # scraper/portals/base.py
 from __future__ import annotations
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Literal
-from playwright.async_api import Page, TimeoutError as PlaywrightTimeout
+from typing import Any, Callable, Dict, Literal, TypeVar
+from playwright.async_api import Page, Error as PlaywrightError, TimeoutError as PlaywrightTimeout
 from bs4 import BeautifulSoup
 
+try:  # lxml builds trees several times faster than the pure-Python parser
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# Serializes just one element (tags included) instead of the whole document
+OUTER_HTML_JS = "el => el.outerHTML"
+
+T = TypeVar("T")
+
 
 class PortalEngine(ABC):
     """Interface every portal scraper must implement."""
 
-    def __init__(self, page: Page, student_id: str, password: str, login_url: str, alt_portal_url: str | None = None, alt_student_id: str | None = None, alt_password: str | None = None, student_name: str | None = None, auth_images: list | None = None) -> None:
+    # Request types the runner aborts for this portal; override when a login needs them
+    BLOCKED_RESOURCES: frozenset[str] = frozenset({"image", "media", "font", "texttrack", "manifest"})
+
+    def __init__(
+        self,
+        page: Page,
+        student_id: str,
+        password: str,
+        login_url: str,
+        *,
+        alt_portal_url: str | None = None,
+        alt_student_id: str | None = None,
+        alt_password: str | None = None,
+        student_name: str | None = None,
+        auth_images: list | None = None,
+    ) -> None:
         self.page = page
         self.sid = student_id
         self.alt_sid = alt_student_id
@@ -32,18 +59,25 @@ class PortalEngine(ABC):
     async def wait(self, selector: str, timeout: int = 15_000) -> None:
         await self.page.locator(selector).wait_for(state="visible", timeout=timeout)
         
-    async def get_soup(self) -> BeautifulSoup:
-        """Ensure the page is loaded before trying to get the soup"""
-        html = await self.page.content()
-        return BeautifulSoup(html, "html.parser")
+    async def get_soup(self, selector: str | None = None) -> BeautifulSoup:
+        """Ensure the page is loaded before trying to get the soup
+
+        Pass a `selector` to pull only the first matching element's HTML from the page."""
+        if selector is not None:
+            html = await self.page.locator(selector).first.evaluate(OUTER_HTML_JS)
+        else:
+            html = await self.page.content()
+        return BeautifulSoup(html, HTML_PARSER)
+
+    async def parse_off_loop(self, parse: Callable[[str], T], html: str) -> T:
+        """Run a synchronous HTML parser in a worker thread so concurrent students keep moving."""
+        return await asyncio.to_thread(parse, html)
 
     async def raise_login_error_if(self, error_condition: bool, message: str = ""):
         """Recieves a condition on which the login has failed, raises LoginError if true"""
         if error_condition:
             raise self.LoginError(f'@{self.login_url}\nFailed to login {self.sid}\n{message}')
 
-    @staticmethod
-
     class LoginError(Exception):
         pass
 
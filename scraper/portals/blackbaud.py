@@ -4,13 +4,13 @@ import logging
 from typing import Dict, Any, Optional
 from playwright.async_api import expect
 from tenacity import (
-    retry, stop_after_attempt, wait_exponential,
+    retry, stop_after_attempt, wait_exponential, wait_random,
     retry_if_exception_type, before_sleep_log
 )
 
 from .base import PortalEngine, PlaywrightTimeout
 from . import register_portal
-from .utils import exists, wait_after_nav, universal_login_flow, grades_table_to_dict
+from .utils import exists, wait_after_nav, universal_login_flow, grades_table_to_dict, start_tracing, stop_tracing
 
 logger = logging.getLogger("blackbaud")
 logger.setLevel(logging.INFO)
@@ -21,43 +21,43 @@ class Blackbaud(PortalEngine):
     # ── LOGIN ─────────────────────────────────────────────────────────────────
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=3, max=15),
+        wait=wait_exponential(multiplier=1, min=3, max=15) + wait_random(0, 1),
         retry=retry_if_exception_type(PlaywrightTimeout),
         before_sleep=before_sleep_log(logger, logging.WARNING),
         reraise=True,  # <- expose inner exception instead of RetryError
     )
     async def login(self, first_name: Optional[str] = None) -> None:
         try:
-            await self.page.context.tracing.start(screenshots=True, snapshots=True)
-            print("[BBG] starting login()")
+            await start_tracing(self.page)
+            logger.debug("starting login() for %s", self.sid)
             # Entry page (Blackbaud SSO landing)
             username_selector = '#Username'
             password_selector = ''
+            # Wait for the username field itself rather than a fixed 3s settle
+            await self.page.goto(self.login_url, wait_until="domcontentloaded")
+            await self.page.locator(username_selector).wait_for(timeout=15000)
             await universal_login_flow(
                 self.page,
-                self.login_url,
+                self.page.url,
                 self.sid,
                 self.pw,
                 username_selector,
                 password_selector,
                 sso_login_selector='#sso-continue-button',
                 google_callback=self.google_login,
-                pre_fill_wait=3000,
-                post_fill_wait=2000
+                pre_fill_wait=0,
             )
-            await wait_after_nav(self.page, pattern='**/app/**', wait_after_load=5000)
+            await wait_after_nav(self.page, pattern='**/app/**', wait_after_load=0)
 
         except Exception as e:
-            import traceback
-            print(e)
-            traceback.print_exc()
+            logger.warning("login failed for %s: %s", self.sid, e, exc_info=True)
             raise e
         finally:
-            print(f"URL post-login: {self.page.url}")
-            await self.page.context.tracing.stop()
+            logger.debug("URL post-login: %s", self.page.url)
+            await stop_tracing(self.page, f"blackbaud-login-{self.sid}")
     async def nav_to_grades(self):
         try:
-            await self.page.wait_for_selector("#coursesContainer", timeout=6000)
+            await self.page.wait_for_selector("#coursesContainer", timeout=10000)
         except PlaywrightTimeout:
             my_day_tab = self.page.get_by_role('link', name='My Day')
             grades_tab = self.page.locator("#topnav-containter").get_by_role("link", name="Progress")
@@ -65,17 +65,18 @@ class Blackbaud(PortalEngine):
                 await self.page.locator('#site-switcher-change').click()
                 await self.page.get_by_role('link', name='Student').click()
                 await self.page.wait_for_load_state()
-                await self.page.wait_for_timeout(2000)
                 await expect(my_day_tab).to_be_visible()
                 grades_tab = self.page.locator("#topnav-containter").get_by_role("link", name="Progress")
 
             await my_day_tab.click()
             await grades_tab.click()
-            await wait_after_nav(self.page, pattern='**/progress**', wait_after_load=2000)
+            await wait_after_nav(self.page, pattern='**/progress**', wait_after_load=0)
+        # Course rows are filled in after the container itself appears
+        await self.page.wait_for_selector("#coursesContainer div.row", timeout=10000)
     # ── FETCH ────────────────────────────────────────────────────────────────
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=3, max=15),
+        wait=wait_exponential(multiplier=1, min=3, max=15) + wait_random(0, 1),
         retry=retry_if_exception_type(PlaywrightTimeout),
         before_sleep=before_sleep_log(logger, logging.WARNING),
         reraise=True,
@@ -94,12 +95,13 @@ class Blackbaud(PortalEngine):
                 table_selector,
                 title_selector,
                 grade_selector,
+                scope_selector="#coursesContainer",
                 truncate_title_on=truncate_on
             )
         except Exception as e:
-            print(e)
+            logger.warning("fetch_grades failed for %s: %s", self.sid, e)
         finally:
-            print(parsed)
+            logger.debug("parsed grades: %s", parsed)
             return {"parsed_grades": parsed}
 
     # ── PARSERS ──────────────────────────────────────────────────────────────
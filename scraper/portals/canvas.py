@@ -5,20 +5,43 @@ import re
 from time import monotonic
 import asyncio
 from datetime import datetime
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Literal
 from urllib.parse import urlparse, urljoin
 
 from bs4 import BeautifulSoup, Tag
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from tenacity import retry, stop_after_attempt, wait_exponential, wait_random, retry_if_exception_type
 from playwright.async_api import TimeoutError
 
-from .base import PortalEngine, PlaywrightTimeout
+from .base import HTML_PARSER, PortalEngine, PlaywrightTimeout
 from . import register_portal, LoginError
 from .utils import exists, canonicalize_grade, wait_after_nav, universal_login_flow, reconcile_day_time
 
 
 # --------------------- utilities ---------------------
 
+_NOT_NOW_RE = re.compile(r"not now", re.I)
+_DONE_RE = re.compile(r"done", re.I)
+_CLOSE_RE = re.compile(r"close", re.I)
+_SKIP_RE = re.compile(r"skip", re.I)
+_AUTH_URL_RE = re.compile(r"/login|signin|saml|oauth|auth", re.I)
+_COURSES_LINK_RE = re.compile(r"^Courses?$", re.I)
+_GRADES_LINK_RE = re.compile(r"^Grades?$", re.I)
+_COURSE_ID_RE = re.compile(r"/courses/(\d+)")
+_TOTAL_PCT_RE = re.compile(r"(?:total|current\s*grade|final)\s*[:\-]?\s*(\d{1,3}(?:\.\d+)?)\s*%")
+_POINTS_RE = re.compile(r"(\d{1,5}(?:\.\d+)?)\s*/\s*(\d{1,5}(?:\.\d+)?)")
+_TOTAL_LABEL_RE = re.compile(r"\b(total|final)\b", re.I)
+_PCT_RE = re.compile(r"(\d{1,3}(?:\.\d+)?)\s*%")
+
+_MY_GRADES_SCORE_SEL = '[data-testid="my-grades-score"]'
+# [course link text, score text] per score; the link lives in the score's parent card
+_SCORE_PAIRS_JS = """
+scores => scores.map(score => {
+  const link = score.parentElement && score.parentElement.querySelector('a[href], [role="link"]');
+  return [link ? link.innerText : '', score.innerText];
+})
+"""
+
 def _origin(url: str) -> str:
     u = urlparse(url)
     return f"{u.scheme}://{u.netloc}" if u.scheme and u.netloc else url
@@ -47,6 +70,7 @@ def _term_context_from_today() -> dict:
     return {"fall_year": fall_year, "spring_year": fall_year + 1, "term": term}
 
 
+@lru_cache(maxsize=4)  # same term for the whole run
 def _build_term_regexes(fall_year: int, spring_year: int, term: str) -> tuple[List[re.Pattern], List[re.Pattern]]:
     yy_fall = fall_year % 100
     yy_spring = spring_year % 100
@@ -137,10 +161,10 @@ class CanvasEngine(PortalEngine):
 
     async def _dismiss_common_popups(self):
         dismiss_targets = [
-            self.page.get_by_role("button", name=re.compile(r"not now", re.I)),
-            self.page.get_by_role("button", name=re.compile(r"done", re.I)),
-            self.page.get_by_role("button", name=re.compile(r"close", re.I)),
-            self.page.get_by_role("button", name=re.compile(r"skip", re.I)),
+            self.page.get_by_role("button", name=_NOT_NOW_RE),
+            self.page.get_by_role("button", name=_DONE_RE),
+            self.page.get_by_role("button", name=_CLOSE_RE),
+            self.page.get_by_role("button", name=_SKIP_RE),
         ]
         for target in dismiss_targets:
             try:
@@ -183,7 +207,7 @@ class CanvasEngine(PortalEngine):
             if await self._exists(sel, timeout=1000):
                 return True
 
-        return not re.search(r"/login|signin|saml|oauth|auth", url, re.I)
+        return not _AUTH_URL_RE.search(url)
 
     async def _has_canvas_login_error(self) -> bool:
         error_targets = [
@@ -279,7 +303,7 @@ class CanvasEngine(PortalEngine):
 
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=0.8, min=0.8, max=3),
+        wait=wait_exponential(multiplier=0.8, min=0.8, max=3) + wait_random(0, 1),
         retry=retry_if_exception_type(PlaywrightTimeout),
         reraise=True,
     )
@@ -434,34 +458,18 @@ class CanvasEngine(PortalEngine):
 
             await self.page.wait_for_selector('[data-testid="my-grades-score"]', state='attached')
             # 2. parse
-            course_grades = await self.page.locator('[data-testid="my-grades-score"]').all()
-            count = len(course_grades)
-            print(f"Found {count} grades")
-            # print("Course cards: ", course_cards)
-            for i in range(count):
-                course_grade = course_grades[i]
-                course_card = course_grade.locator('xpath=..') # nav to the parent, we got a list of grades which are inner elems
-                course = await course_card.get_by_role('link').inner_text()
-                grade_str: str = await course_grade.inner_text()
-                if grade_str.lower() == "no grade":
-                    continue
-                print("Canvas: Grade found", grade_str)
-                grade = canonicalize_grade(grade_str)
-                if grade:
-                    parsed[course] = grade
-                # print(course, grade_str)
-            # print(grade_cards)
-            return parsed
+            return await self._parse_list_view_scores()
 
-        course_grades = await self.page.locator('[data-testid="my-grades-score"]').all()
-        count = len(course_grades)
-        print(f"Found {count} grades")
+        return await self._parse_list_view_scores()
 
-        for i in range(count):
-            course_grade = course_grades[i]
-            course_card = course_grade.locator("xpath=..")
-            course = await course_card.get_by_role("link").inner_text()
-            grade_str: str = await course_grade.inner_text()
+    async def _parse_list_view_scores(self) -> dict[str, float]:
+        """Read every [course link, score] pair off the list view in one round-trip."""
+        parsed: dict[str, float] = {}
+        pairs = await self.page.eval_on_selector_all(_MY_GRADES_SCORE_SEL, _SCORE_PAIRS_JS)
+        print(f"Found {len(pairs)} grades")
+        for course, grade_str in pairs:
+            if not course:  # no course link on the row; the old per-row lookup failed here too
+                continue
             if grade_str.lower() == "no grade":
                 continue
             print("Canvas: Grade found", grade_str)
@@ -491,7 +499,7 @@ class CanvasEngine(PortalEngine):
 
         opened = False
         try:
-            await self.page.get_by_role("link", name=re.compile(r"^Courses?$", re.I)).click(timeout=5000)
+            await self.page.get_by_role("link", name=_COURSES_LINK_RE).click(timeout=5000)
             opened = True
         except Exception:
             for sel in (
@@ -517,7 +525,7 @@ class CanvasEngine(PortalEngine):
 
         for a in links:
             href = (await a.get_attribute("href")) or ""
-            m = re.search(r"/courses/(\d+)", href)
+            m = _COURSE_ID_RE.search(href)
             if not m:
                 continue
 
@@ -540,7 +548,7 @@ class CanvasEngine(PortalEngine):
 
             for a in links:
                 href = (await a.get_attribute("href")) or ""
-                m = re.search(r"/courses/(\d+)", href)
+                m = _COURSE_ID_RE.search(href)
                 if not m:
                     continue
 
@@ -559,7 +567,7 @@ class CanvasEngine(PortalEngine):
         results: dict[str, float] = {}
 
         for course_url in hrefs:
-            cid_match = re.search(r"/courses/(\d+)", course_url)
+            cid_match = _COURSE_ID_RE.search(course_url)
             cid = cid_match.group(1) if cid_match else "unknown"
             course_name = f"Course {cid}"
 
@@ -575,7 +583,7 @@ class CanvasEngine(PortalEngine):
 
                 grades_clicked = False
                 try:
-                    await self.page.get_by_role("link", name=re.compile(r"^Grades?$", re.I)).click(timeout=3000)
+                    await self.page.get_by_role("link", name=_GRADES_LINK_RE).click(timeout=3000)
                     grades_clicked = True
                 except Exception:
                     for sel in (
@@ -612,13 +620,13 @@ class CanvasEngine(PortalEngine):
     # ----------------- HTML parsing heuristics -----------------
 
     def _parse_canvas_grades_html(self, html: str) -> Dict[str, Any]:
-        soup = BeautifulSoup(html, "html.parser")
+        soup = BeautifulSoup(html, HTML_PARSER)
         text = soup.get_text(" ", strip=True).lower()
 
-        pm = re.search(r"(?:total|current\s*grade|final)\s*[:\-]?\s*(\d{1,3}(?:\.\d+)?)\s*%", text)
+        pm = _TOTAL_PCT_RE.search(text)
         percent = pm.group(1) if pm else None
 
-        pmm = re.search(r"(\d{1,5}(?:\.\d+)?)\s*/\s*(\d{1,5}(?:\.\d+)?)", text)
+        pmm = _POINTS_RE.search(text)
         points = f"{pmm.group(1)}/{pmm.group(2)}" if pmm else None
 
         total_value = None
@@ -626,7 +634,7 @@ class CanvasEngine(PortalEngine):
             cells = [c.get_text(" ", strip=True) for c in row.select("th,td")]
             if not cells:
                 continue
-            if re.search(r"\b(total|final)\b", cells[0], re.I):
+            if _TOTAL_LABEL_RE.search(cells[0]):
                 for c in reversed(cells[1:]):
                     if c:
                         total_value = c
@@ -634,10 +642,10 @@ class CanvasEngine(PortalEngine):
                 break
 
         if total_value:
-            m_pct = re.search(r"(\d{1,3}(?:\.\d+)?)\s*%", total_value)
+            m_pct = _PCT_RE.search(total_value)
             if m_pct:
                 percent = m_pct.group(1)
-            m_pts = re.search(r"(\d{1,5}(?:\.\d+)?)\s*/\s*(\d{1,5}(?:\.\d+)?)", total_value)
+            m_pts = _POINTS_RE.search(total_value)
             if m_pts:
                 points = f"{m_pts.group(1)}/{m_pts.group(2)}"
 
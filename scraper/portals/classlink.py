@@ -1,10 +1,10 @@
 from __future__ import annotations
 from typing import Any, Dict, Optional
-from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
-from .base import PortalEngine, PlaywrightTimeout
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential, wait_random
+from .base import PortalEngine, PlaywrightError, PlaywrightTimeout
 from . import register_portal
 from scraper.portals.infinite_campus import InfiniteCampus
-from .utils import universal_login_flow, wait_after_nav
+from .utils import start_tracing, stop_tracing, universal_login_flow, wait_after_nav
 
 # TODO: Uses Infinite Campus after RapidIdentity; you can remove those pieces later if not needed.
 @register_portal("classlink")
@@ -12,11 +12,12 @@ class Classlink(PortalEngine):
     """Classlink is purely a passthrough to other portals, but must be used sometimes as SSO"""
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
+        wait=wait_exponential(multiplier=1, min=4, max=10) + wait_random(0, 1),
         retry=retry_if_exception_type(PlaywrightTimeout),
         reraise=True,
     )
     async def login(self, first_name: Optional[str] = None) -> None:
+        await start_tracing(self.page)
         try:
             username_selector = 'input#username'
             pw_selector = 'input#password'
@@ -42,12 +43,12 @@ class Classlink(PortalEngine):
             raise self.LoginError(e)
         finally:
             # await self.page.wait_for_load_state("networkidle")
-            await self.page.context.tracing.stop()
+            await stop_tracing(self.page, f"classlink-login-{self.sid}")
     # ---------------------- FETCH (notifications → latest per subject) -------
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
-        retry=retry_if_exception_type(Exception),
+        wait=wait_exponential(multiplier=1, min=4, max=10) + wait_random(0, 1),
+        retry=retry_if_exception_type(PlaywrightError),
     )
     async def fetch_grades(self) -> Dict[str, Any]:
         print('fetching grades')
@@ -1,21 +1,25 @@
 from __future__ import annotations
 from typing import Any, Dict, Optional, Literal
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from tenacity import retry, stop_after_attempt, wait_exponential, wait_random, retry_if_exception_type
 from datetime import datetime, date, time
 # from bs4 import BeautifulSoup
 
 from scraper.portals.base import PortalEngine, PlaywrightTimeout
 from scraper.portals import register_portal, get_portal
-from .utils import exists, wait_after_nav, reconcile_day_time, grades_table_to_dict, get_portal_key_from_url
+from .utils import exists, wait_after_nav, reconcile_day_time, grades_table_to_dict, get_portal_key_from_url, start_tracing, stop_tracing
 
 @register_portal("google_classroom")
 class GoogleClassroom(PortalEngine):
+    # Login may hand off to any other portal (including GPS pictographs)
+    BLOCKED_RESOURCES = frozenset()
+
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
+        wait=wait_exponential(multiplier=1, min=2, max=10) + wait_random(0, 1),
         retry=retry_if_exception_type(PlaywrightTimeout),
     )
     async def login(self, first_name: Optional[str] = None) -> None:
+        await start_tracing(self.page)
         try: # in theory, we should just use the Google sign in
             # in reality, after inserting the username, the page may reroute to some internal portal
             if self.login_url != self.page.url:  # Only nav if we are not at the target page
@@ -40,7 +44,7 @@ class GoogleClassroom(PortalEngine):
             print(f"{type(e)}: {e}")
             raise
         finally:
-            await self.page.context.tracing.stop()
+            await stop_tracing(self.page, f"google_classroom-login-{self.sid}")
 
     async def get_agenda(self, get: Literal["upcoming", "missing"] = "upcoming") -> dict[str, list[tuple]]:
         agenda: dict[str, list[tuple]] = {}  # dict like {date: [(class, assignment, due_time),  ...]}
@@ -1,17 +1,42 @@
 from __future__ import annotations
+import re
 from typing import Any, Dict, Optional
 from tenacity import (
     retry,
     retry_if_exception_type,
     stop_after_attempt,
-    wait_exponential,
+    wait_exponential, wait_random,
 )
 
 from scraper.portals.infinite_campus import InfiniteCampus
 
 from . import register_portal
 from .base import PortalEngine
-from .utils import universal_login_flow, wait_after_nav, PlaywrightTimeout
+from .utils import start_tracing, stop_tracing, universal_login_flow, wait_after_nav, PlaywrightTimeout
+
+_NAV_WRAPPER_RE = re.compile("nav-wrapper")
+# Clicks the first tile whose normalized alt is in `auth` (already stripped and
+# lowercased) and remembers it for _NEXT_ROUND_JS; returns every alt and the one clicked
+_PICK_TILE_JS = """
+(auth) => {
+  const wanted = new Set(auth);
+  const imgs = Array.from(document.querySelectorAll('.pictograph-list img.tile-icon'));
+  const hit = imgs.find(img => wanted.has(img.alt.trim().toLowerCase()));
+  window.__gpsPickedTile = hit || null;
+  if (hit) hit.click();
+  return {alts: imgs.map(img => img.alt), hit: hit ? hit.alt : null};
+}
+"""
+# True once the next round's tiles are up: the clicked tile has been detached by the
+# re-render (even if the new round shows the same tiles), or the tile list changed
+_NEXT_ROUND_JS = """
+(prev) => {
+  const alts = Array.from(document.querySelectorAll('.pictograph-list img.tile-icon'), img => img.alt);
+  if (alts.length === 0) return false;
+  const picked = window.__gpsPickedTile;
+  return (picked && !picked.isConnected) || alts.join('\\n') !== prev.join('\\n');
+}
+"""
 
 
 @register_portal("gps")
@@ -23,15 +48,18 @@ class GPS(PortalEngine):
     dictionaries under the ``parsed_grades`` key.
     """
 
+    # The pictograph login clicks image tiles, so images must load
+    BLOCKED_RESOURCES = frozenset({"media", "font", "texttrack", "manifest"})
+
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
+        wait=wait_exponential(multiplier=1, min=4, max=10) + wait_random(0, 1),
         retry=retry_if_exception_type(PlaywrightTimeout),
         reraise=True,
     )
     async def login(self, first_name: Optional[str] = None) -> None:
         """Authenticate the user on the GPS parent portal."""
-        await self.page.context.tracing.start(screenshots=True, snapshots=True)
+        await start_tracing(self.page)
         username_selector = "input#identification"
         password_selector = "input#ember535"
         await universal_login_flow(
@@ -41,14 +69,13 @@ class GPS(PortalEngine):
             self.pw,
             username_selector,
             password_selector,
-            post_fill_wait=4000,
         )
 
         # Pictograph auth (three picks)
         print("waiting on pictograph\n")
         await self.do_gps_auth()
 
-        await self.page.context.tracing.stop()
+        await stop_tracing(self.page, f"gps-login-{self.sid}")
 
     # Login Helper
     async def do_gps_auth(self):
@@ -58,27 +85,24 @@ class GPS(PortalEngine):
         await self.page.locator(".pictograph-list img.tile-icon").first.wait_for(
             state="visible", timeout=15_000
         )
-        await self.page.wait_for_load_state("networkidle")
 
-        for _ in range(0, 3):
-            images_alts = await self.page.eval_on_selector_all(
-                ".pictograph-list img.tile-icon", "imgs => imgs.map(img => img.alt)"
-            )
-            
-            user_match = None
-            for alt in images_alts:
-                print(f"Checking if {alt} in {self.auth_images}")
-                if alt in self.auth_images:
-                    user_match = alt
-                    break
-            if not user_match:
+        # Normalized once; the portal's alt text doesn't always match the stored case
+        auth_lower = [image.strip().lower() for image in self.auth_images]
+
+        for round_ in range(0, 3):
+            # Find and click the first tile the student picked, in one round-trip
+            pick = await self.page.evaluate(_PICK_TILE_JS, auth_lower)
+            images_alts = pick["alts"]
+            print(f"Checked {images_alts} against {self.auth_images}: {pick['hit']}")
+            if not pick["hit"]:
                 raise RuntimeError(
                     f"No pictograph match found in {images_alts} for {self.auth_images}"
                 )
-            await self.page.locator(
-                f".pictograph-list img.tile-icon[alt='{user_match}']"
-            ).click()
-            await self.page.wait_for_timeout(1000)
+            if round_ < 2:
+                # Next round is ready once the clicked tile is replaced
+                await self.page.wait_for_function(
+                    _NEXT_ROUND_JS, arg=images_alts, timeout=10_000
+                )
 
     async def nav_to_ic(self):
         # nav to infinite campus portal
@@ -86,14 +110,24 @@ class GPS(PortalEngine):
             await self.page.locator("img[alt='STUDENT INFINITE CAMPUS']").click()
             self.page = await popup.value
 
-        await wait_after_nav(self.page, wait_after_load=5000, wait_until="networkidle")
+        # The popup lands on IC's nav-wrapper shell; nav_to_grades waits for its menu
+        try:
+            await wait_after_nav(
+                self.page,
+                pattern=_NAV_WRAPPER_RE,
+                timeout=30_000,
+                wait_after_load=0,
+                wait_until="domcontentloaded",
+            )
+        except PlaywrightTimeout:
+            pass
         await self.raise_login_error_if("nav-wrapper" not in self.page.url)
         print("Successfully reached the home page")
 
     # ---------------------- FETCH (notifications → latest per subject) -------
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
+        wait=wait_exponential(multiplier=1, min=4, max=10) + wait_random(0, 1),
         retry=retry_if_exception_type(TimeoutError),
     )
     async def fetch_grades(self) -> Dict[str, Any]:
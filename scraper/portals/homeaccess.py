@@ -5,14 +5,16 @@ from typing import Any, Dict, Optional
 from urllib.parse import urlsplit
 
 from bs4 import BeautifulSoup  # type: ignore[import-untyped]
-from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential, wait_random
 
 from . import register_portal
-from .base import PortalEngine, PlaywrightTimeout
+from .base import HTML_PARSER, PortalEngine, PlaywrightTimeout
 from .utils import (
     canonicalize_course_title,
     canonicalize_grade,
     exists,
+    start_tracing,
+    stop_tracing,
     universal_login_flow,
     wait_after_nav,
 )
@@ -20,17 +22,22 @@ from .utils import (
 
 _INVALID_LOGIN_TEXT = "Your attempt to log in was unsuccessful."
 _ASSIGNMENTS_PATH = "/HomeAccess/Content/Student/Assignments.aspx"
+_CLASSWORK_URL_RE = re.compile("/HomeAccess/Classes/Classwork")
+_COURSE_PREFIX_RE = re.compile(r"^\s*\d[\d\s]*\s*-\s*[\w]+\s+")
+_MP_AVERAGE_RE = re.compile(r"MP Average\s*([0-9]+(?:\.[0-9]+)?)%", re.I)
+_OVERALL_AVERAGE_RE = re.compile(r"Course overall average is:.*?=\s*([0-9]+(?:\.[0-9]+)?)%", re.I)
 
 
 @register_portal("homeaccess")
 class HomeAccess(PortalEngine):
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
+        wait=wait_exponential(multiplier=1, min=2, max=10) + wait_random(0, 1),
         retry=retry_if_exception_type(PlaywrightTimeout),
         reraise=True,
     )
     async def login(self, first_name: Optional[str] = None) -> None:
+        await start_tracing(self.page)
         try:
             await universal_login_flow(
                 self.page,
@@ -52,7 +59,7 @@ class HomeAccess(PortalEngine):
             await self.page.goto(self._classwork_url(), wait_until="domcontentloaded")
             await wait_after_nav(
                 self.page,
-                pattern=lambda url: "/HomeAccess/Classes/Classwork" in url if url else False,
+                pattern=_CLASSWORK_URL_RE,
                 wait_until="domcontentloaded",
                 wait_after_load=1000,
             )
@@ -66,14 +73,11 @@ class HomeAccess(PortalEngine):
             print(e)
             raise
         finally:
-            try:
-                await self.page.context.tracing.stop()
-            except Exception:
-                pass
+            await stop_tracing(self.page, f"homeaccess-login-{self.sid}")
 
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
+        wait=wait_exponential(multiplier=1, min=2, max=10) + wait_random(0, 1),
         retry=retry_if_exception_type(PlaywrightTimeout),
         reraise=True,
     )
@@ -83,7 +87,7 @@ class HomeAccess(PortalEngine):
             raise self.LoginError("HomeAccess classwork iframe not found")
 
         html = await frame.content()
-        return {"parsed_grades": self.parse_classwork_html(html)}
+        return {"parsed_grades": await self.parse_off_loop(self.parse_classwork_html, html)}
 
     def _classwork_url(self) -> str:
         parsed = urlsplit(self.login_url)
@@ -107,7 +111,7 @@ class HomeAccess(PortalEngine):
 
     @classmethod
     def parse_classwork_html(cls, html: str) -> Dict[str, float]:
-        soup = BeautifulSoup(html, "html.parser")
+        soup = BeautifulSoup(html, HTML_PARSER)
         parsed: Dict[str, float] = {}
 
         for card in soup.select("div.AssignmentClass"):
@@ -124,23 +128,19 @@ class HomeAccess(PortalEngine):
 
     @staticmethod
     def _normalize_course_title(title: str) -> str:
-        stripped = re.sub(r"^\s*\d[\d\s]*\s*-\s*[\w]+\s+", "", title).strip()
+        stripped = _COURSE_PREFIX_RE.sub("", title).strip()
         return canonicalize_course_title(stripped)
 
     @staticmethod
     def _extract_average(card: Any) -> float | None:
         for elem in card.select("span.sg-header-heading"):
             text = elem.get_text(" ", strip=True)
-            match = re.search(r"MP Average\s*([0-9]+(?:\.[0-9]+)?)%", text, re.I)
+            match = _MP_AVERAGE_RE.search(text)
             if match:
                 return canonicalize_grade(match.group(1))
 
         card_text = card.get_text(" ", strip=True)
-        fallback = re.search(
-            r"Course overall average is:.*?=\s*([0-9]+(?:\.[0-9]+)?)%",
-            card_text,
-            re.I,
-        )
+        fallback = _OVERALL_AVERAGE_RE.search(card_text)
         if fallback:
             return canonicalize_grade(fallback.group(1))
         return None
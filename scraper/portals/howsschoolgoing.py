@@ -2,7 +2,7 @@ from __future__ import annotations
 from typing import Any, Dict, Optional
 from scraper.portals.base import PortalEngine, PlaywrightTimeout
 from scraper.portals import register_portal
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from tenacity import retry, stop_after_attempt, wait_exponential, wait_random, retry_if_exception_type
 
 from scraper.portals.utils import universal_login_flow, wait_after_nav, truncate_title, canonicalize_grade
 
@@ -11,7 +11,7 @@ from scraper.portals.utils import universal_login_flow, wait_after_nav, truncate
 class HowsSchoolGoing(PortalEngine):
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
+        wait=wait_exponential(multiplier=1, min=2, max=10) + wait_random(0, 1),
         retry=retry_if_exception_type(PlaywrightTimeout),
     )
     async def login(self, first_name: Optional[str] = None) -> None:
@@ -38,7 +38,7 @@ class HowsSchoolGoing(PortalEngine):
             pass
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
+        wait=wait_exponential(multiplier=1, min=2, max=10) + wait_random(0, 1),
         retry=retry_if_exception_type(PlaywrightTimeout),
     )
     async def fetch_grades(self) -> Dict[str, Any]:
@@ -46,7 +46,7 @@ class HowsSchoolGoing(PortalEngine):
             raise self.LoginError('No grades page')
         parsed = {}
         try:
-            soup = await self.get_soup()
+            soup = await self.get_soup("div.dataSource_Common_StudentProfile_Grades_GradesTable")
             course_table = soup.find("div", class_="dataSource_Common_StudentProfile_Grades_GradesTable")
             courses = course_table.find_all('tr') # possible 
             print(f'found {len(courses)} courses')
@@ -3,11 +3,11 @@ from datetime import datetime
 from typing import Any, Optional
 
 from playwright.async_api import Frame, Page, expect
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from tenacity import retry, stop_after_attempt, wait_exponential, wait_random, retry_if_exception_type
 
 from . import register_portal  # helper we'll create in __init__.py
 from .base import PortalEngine, PlaywrightTimeout
-from .utils import exists, grades_table_to_dict, universal_login_flow
+from .utils import exists, grades_table_to_dict, start_tracing, stop_tracing, universal_login_flow
 
 
 @register_portal("infinite_campus")
@@ -16,7 +16,7 @@ class InfiniteCampus(PortalEngine):
     # ---------------------- LOGIN (home only) ----------------------
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
+        wait=wait_exponential(multiplier=1, min=4, max=10) + wait_random(0, 1),
         retry=retry_if_exception_type(PlaywrightTimeout),
     )
     async def login(self, first_name: Optional[str] = None) -> None:
@@ -24,6 +24,7 @@ class InfiniteCampus(PortalEngine):
         print(f"[IC] Logging in {first_name}")
         username_selector = '#username'
         password_selector = '#password'
+        await start_tracing(self.page)
         try:
             await universal_login_flow(
                 self.page,
@@ -41,7 +42,8 @@ class InfiniteCampus(PortalEngine):
             login_failed = await exists(self.page.get_by_text(invalid_creds_msg, exact=False))
             await self.raise_login_error_if(login_failed, "Infinite Campus login failed due to incorrect credentials")
             await self.raise_login_error_if('nav-wrapper' not in self.page.url)
-            await self.page.wait_for_load_state("networkidle")
+            # The shell's menu gates everything after login (student picker, grades nav)
+            await self.page.locator("#menu-toggle-button").wait_for()
             print("[IC] nav-wrapper found in url, login successful.")
             print("Successfully reached the home page")
             await self.select_student(first_name, self.page) # select for student if necessary
@@ -50,7 +52,7 @@ class InfiniteCampus(PortalEngine):
             print(e)
             raise
         finally:
-            await self.page.context.tracing.stop()
+            await stop_tracing(self.page, f"infinite_campus-login-{self.sid}")
     # helper
     @staticmethod
     async def select_student(first_name: str, page: Page):
@@ -59,7 +61,9 @@ class InfiniteCampus(PortalEngine):
             parent = page
         try:  # click the student with first name if it exists
             print(f"[IC] Attempting to select student {first_name}")
-            await parent.get_by_role('link', name=first_name, exact=False).click(timeout=2000)
+            # CSS + has_text avoids the accessible-name walk get_by_role does over the whole frame;
+            # visible only, so a collapsed menu or off-screen card can't win .first
+            await parent.locator("a[href], [role='link']").filter(has_text=first_name).filter(visible=True).first.click(timeout=2000)
         except PlaywrightTimeout as e:
             print(e)
             print(f"[IC] Could not find student {first_name}, continuing without selecting.")
@@ -76,8 +80,7 @@ class InfiniteCampus(PortalEngine):
             await self.page.wait_for_selector(menu_selector)
             await self.page.locator(menu_selector).click()
             await self.page.get_by_role("link", name=grades_button_label).click()
-            await self.page.wait_for_url(grades_url_pattern, timeout=20000)
-            await self.page.wait_for_load_state("networkidle")
+            await self.page.wait_for_url(grades_url_pattern, timeout=20000, wait_until="domcontentloaded")
 
     @staticmethod
     def term_semester_from_today() -> int:
@@ -99,20 +102,22 @@ class InfiniteCampus(PortalEngine):
     # ---------------------- FETCH (notifications → latest per subject) -------
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
+        wait=wait_exponential(multiplier=1, min=4, max=10) + wait_random(0, 1),
         retry=retry_if_exception_type(PlaywrightTimeout),
     )
     async def fetch_grades(self) -> dict[Any, Any] | None: # TODO: Alter to parse from 'All terms' instead of 'Current term'
         """Collect grades from the grade tab"""
-        await self.page.wait_for_load_state()
-        await self.page.wait_for_timeout(1500)
         # get grades
         try:
             # 0) ensure we are on the grades page and targeting the right timeframe
             await self.nav_to_grades()
 
             frame_selector = "main-workspace"
+            # The grades URL can match before the workspace iframe is attached
+            await self.page.locator(f"iframe[name='{frame_selector}']").wait_for(state="attached")
             frame = self.page.frame(frame_selector)
+            if frame is None:
+                raise PlaywrightTimeout(f"Infinite Campus frame '{frame_selector}' never attached (url={self.page.url})")
             # target the correct timeframe
 
 
@@ -120,6 +125,12 @@ class InfiniteCampus(PortalEngine):
 
             # collect grades
             table_selector = "div.collapsible-card.grades__card"
+            # Wait for the cards themselves rather than for network quiet; a student
+            # with no cards falls through to the timeframe/table handling below
+            try:
+                await frame.locator(table_selector).first.wait_for(timeout=15000)
+            except PlaywrightTimeout:
+                pass
             course_selector = "h4 a"
             grades_selector = ".grading-score div"
 
@@ -1,11 +1,56 @@
 from __future__ import annotations
 
+import re
 from typing import List, Dict, Any, Optional
 
 from bs4 import BeautifulSoup  # type: ignore
-from .base import PortalEngine
+from .base import HTML_PARSER, PlaywrightError, PortalEngine
+from .utils import normalize_whitespace, start_tracing, stop_tracing
 from . import register_portal  # helper we'll create in __init__.py
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from tenacity import retry, stop_after_attempt, wait_exponential, wait_random, retry_if_exception_type
+
+# "(93.5%)" inside a tl-grading-score element
+_PCT_RE = re.compile(r"\(\s*(\d{1,3}(?:\.\d+)?)\s*%\s*\)")
+_HOME_URL_RE = re.compile("home")
+_GRADES_URL_RE = re.compile("/apps/portal/parent/grades")
+_CARD_CSS = "div.collapsible-card.grades__card"
+# Mirrors _parse_quarter_grades, run in the page: first "Quarter Grade" row per card
+_EXTRACT_CARDS_JS = """
+cards => cards.map(card => {
+  const header = card.querySelector('tl-grading-section-header');
+  const nameTag = header && (header.querySelector('a') || header.querySelector('h4'));
+  const taskList = card.querySelector('tl-grading-task-list');
+  let grade = null;
+  for (const li of taskList ? taskList.querySelectorAll('li') : []) {
+    const type = li.querySelector('span.ng-star-inserted');
+    if (!type || !type.textContent.includes('Quarter Grade')) continue;
+    const score = li.querySelector('tl-grading-score');
+    if (!score) continue;
+    const bolds = Array.from(score.querySelectorAll('b'), b => b.textContent.trim());
+    grade = {
+      type: type.textContent.trim(),
+      letter: bolds.length ? bolds[0] : null,
+      text: score.textContent,
+      bolds,
+    };
+    break;
+  }
+  // Collapse whitespace runs like normalize_whitespace() does on the soup path
+  return {name: nameTag ? nameTag.textContent.replace(/\\s+/g, ' ').trim() : null, grade};
+})
+"""
+
+
+def _percentage_fields(score_text: str, bold_texts: List[str]) -> Dict[str, Any]:
+    """Return ``percentage``, or ``percentage_raw`` for a "(…%)" bold that isn't numeric."""
+    m = _PCT_RE.search(score_text)
+    if m:
+        return {"percentage": float(m.group(1))}
+    for txt in bold_texts:
+        if txt.startswith("(") and "%" in txt:
+            return {"percentage_raw": txt}
+    return {}
+
 
 @register_portal("microsoft_benjamin_franklin")
 class Microsoft(PortalEngine):
@@ -18,8 +63,8 @@ class Microsoft(PortalEngine):
 
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
-        retry=retry_if_exception_type(Exception),
+        wait=wait_exponential(multiplier=1, min=4, max=10) + wait_random(0, 1),
+        retry=retry_if_exception_type(PlaywrightError),
     )
     async def login(self, first_name: Optional[str] = None) -> None:
         """Authenticate the user on the CCSD parent portal.
@@ -31,58 +76,70 @@ class Microsoft(PortalEngine):
                 so this argument is ignored, but it is accepted for
                 compatibility with the ``PortalEngine`` interface.
         """
-        await self.page.context.tracing.start(screenshots=True, snapshots=True)
-        await self.page.goto(self.login_url, wait_until="domcontentloaded")
-        await self.microsoft_login()
-        # Wait until the URL contains "home" indicating successful login
-        await self.page.wait_for_url(lambda url: "home" in url, timeout=15_000)
-        # Wait for network to be idle to ensure the home page is fully loaded
-        await self.page.wait_for_load_state("networkidle")
+        await start_tracing(self.page)
+        try:
+            await self.page.goto(self.login_url, wait_until="domcontentloaded")
+            await self.microsoft_login()
+            # Wait until the URL contains "home" indicating successful login; fetch_grades
+            # navigates straight to the gradebook, so the home page needn't finish loading
+            await self.page.wait_for_url(_HOME_URL_RE, timeout=15_000, wait_until="domcontentloaded")
+        finally:
+            await stop_tracing(self.page, f"microsoft-login-{self.sid}")
 
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
-        retry=retry_if_exception_type(Exception),
+        wait=wait_exponential(multiplier=1, min=4, max=10) + wait_random(0, 1),
+        retry=retry_if_exception_type(PlaywrightError),
     )
     async def fetch_grades(self) -> dict:
         """Navigate to the gradebook and return a dict of parsed grades."""
         await self.page.goto(self.GRADEBOOK, wait_until="domcontentloaded")
-        # Allow some time for dynamic content to load
-        await self.page.wait_for_timeout(3_000)
-        html_dump: Optional[str] = None
+        # Race the legacy iframe against the in-page grade cards; whichever
+        # renders first tells us where the gradebook lives.
+        iframe = self.page.locator("iframe#main-workspace")
+        await iframe.or_(self.page.locator(_CARD_CSS)).first.wait_for(timeout=30_000)
         frame = None
-        # Attempt to find the legacy iframe
-        try:
-            await self.page.wait_for_selector("iframe#main-workspace", timeout=10_000)
-            frame = self.page.frame(
-                url=lambda u: "/apps/portal/parent/grades" in u if u else False
-            )
-        except Exception:
-            frame = None
-        if frame:
-            # Wait for network idle inside the iframe and capture its content
-            await frame.wait_for_load_state("networkidle")
-            html_dump = await frame.content()
-        else:
-            # No iframe present – grades are in the top‑level page.  Wait for
-            # grade cards to appear and for the network to be idle before
-            # collecting the HTML.
-            await self.page.wait_for_selector(
-                "div.collapsible-card.grades__card, div.collapsible-card, div.card",
-                timeout=30_000,
-            )
-            await self.page.wait_for_load_state("networkidle")
-            html_dump = await self.page.content()
-        parsed = self._parse_quarter_grades(html_dump or "")
+        if await iframe.count():
+            handle = await iframe.element_handle()
+            frame = await handle.content_frame() if handle else None
+            if frame is None:
+                raise PlaywrightError("iframe#main-workspace has no content frame")
+            # The iframe can attach before it navigates to the gradebook
+            await frame.wait_for_url(_GRADES_URL_RE, timeout=15_000, wait_until="domcontentloaded")
+            await frame.wait_for_selector("div.collapsible-card, div.card", timeout=15_000)
+        # No iframe present – grades are in the top‑level page.
+        target = frame or self.page
+        # Pull just the grade fields out of the DOM; fall back to parsing
+        # the whole document if no cards match.
+        cards = await target.eval_on_selector_all(_CARD_CSS, _EXTRACT_CARDS_JS)
+        if cards:
+            return {"parsed_grades": self._courses_from_cards(cards)}
+        html_dump = await target.content()
+        parsed = await self.parse_off_loop(self._parse_quarter_grades, html_dump or "")
         return {"parsed_grades": parsed}
 
+    @staticmethod
+    def _courses_from_cards(cards: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Shape ``_EXTRACT_CARDS_JS`` output like ``_parse_quarter_grades`` does."""
+        courses: List[Dict[str, Any]] = []
+        for card in cards:
+            grade = card.get("grade")
+            if not card.get("name") or not grade:
+                continue
+            grade_data: Dict[str, Any] = {"type": grade["type"]}
+            if grade.get("letter"):
+                grade_data["letter_grade"] = grade["letter"]
+            grade_data.update(_percentage_fields(grade.get("text") or "", grade.get("bolds") or []))
+            courses.append({"course_name": card["name"], "quarter_grade": grade_data})
+        return courses
+
     # Grade Parser Function
     def _parse_quarter_grades(self, html: str) -> List[Dict[str, Any]]:
         """Extract quarter grades (letter + percentage) from grade-page HTML."""
-        soup = BeautifulSoup(html, "html.parser")
+        soup = BeautifulSoup(html, HTML_PARSER)
         courses: List[Dict[str, Any]] = []
         # course cards
-        for card in soup.select("div.collapsible-card.grades__card"):
+        for card in soup.select(_CARD_CSS):
             header = card.find("tl-grading-section-header")
             if not header:
                 continue
@@ -90,7 +147,7 @@ class Microsoft(PortalEngine):
             name_tag = header.find("a") or header.find("h4")
             if not name_tag:
                 continue
-            course_name = name_tag.get_text(strip=True)
+            course_name = normalize_whitespace(name_tag.get_text())
             task_list = card.find("tl-grading-task-list")
             if not task_list:
                 continue
@@ -108,14 +165,10 @@ class Microsoft(PortalEngine):
                 if letter_b:
                     grade_data["letter_grade"] = letter_b.text.strip()
                 # any (xx.x%) → percentage
-                for b in score_span.find_all("b"):
-                    txt = b.text.strip()
-                    if txt.startswith("(") and "%" in txt:
-                        try:
-                            grade_data["percentage"] = float(txt.strip("()%"))
-                        except ValueError:
-                            grade_data["percentage_raw"] = txt
-                        break
+                grade_data.update(_percentage_fields(
+                    score_span.get_text(" ", strip=True),
+                    [b.text.strip() for b in score_span.find_all("b")],
+                ))
                 quarter_grade = grade_data
                 break  # only one per course
             if quarter_grade:
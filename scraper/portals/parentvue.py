@@ -1,19 +1,20 @@
 from __future__ import annotations
 from typing import Any, Dict, Optional
 
-from scraper.portals.base import PortalEngine, PlaywrightTimeout
+from scraper.portals.base import PortalEngine, PlaywrightError, PlaywrightTimeout
 from scraper.portals import register_portal
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-from .utils import grades_table_to_dict, universal_login_flow, wait_after_nav
+from tenacity import retry, stop_after_attempt, wait_exponential, wait_random, retry_if_exception_type
+from .utils import grades_table_to_dict, start_tracing, stop_tracing, universal_login_flow, wait_after_nav
 
 @register_portal("parentvue")
 class ParentVUE(PortalEngine):
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
+        wait=wait_exponential(multiplier=1, min=2, max=10) + wait_random(0, 1),
         retry=retry_if_exception_type(PlaywrightTimeout),
     )
     async def login(self, first_name: Optional[str] = None) -> None:
+        await start_tracing(self.page)
         try:
             username_selector = '#ctl00_MainContent_username'
             password_selector = '#ctl00_MainContent_password'
@@ -39,14 +40,14 @@ class ParentVUE(PortalEngine):
             print(f"{type(e)}: {e}")
             raise
         finally:
-            await self.page.context.tracing.stop()
+            await stop_tracing(self.page, f"parentvue-login-{self.sid}")
 
 
 
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type(Exception),
+        wait=wait_exponential(multiplier=1, min=2, max=10) + wait_random(0, 1),
+        retry=retry_if_exception_type(PlaywrightError),
     )
     async def select_student(self, first_name: Optional[str] = None):
         """
@@ -87,19 +88,20 @@ class ParentVUE(PortalEngine):
 
         # 3) Find and click the matching student-info
         items = self.page.locator(item_info)
-        n = await items.count()
-        if n == 0:
+        # One name per item in a single round-trip, kept index-aligned with `items`
+        names = await items.evaluate_all(
+            "els => els.map(e => { const n = e.querySelector('.student-name'); return n ? n.innerText : ''; })"
+        )
+        if not names:
             raise RuntimeError("No student items in dropdown")
 
         agu = None
-        for i in range(n):
-            info = items.nth(i)
-            name = (await info.locator(".student-name").inner_text()).strip()
-            if target_lc in name.lower():
-                agu = await info.get_attribute("data-agu")
-                await info.click()
-                print(f"[PARENTVUE] Clicked student '{name}' (AGU={agu})")
-                break
+        match = next((i for i, name in enumerate(names) if target_lc in name.strip().lower()), None)
+        if match is not None:
+            info = items.nth(match)
+            agu = await info.get_attribute("data-agu")
+            await info.click()
+            print(f"[PARENTVUE] Clicked student '{names[match].strip()}' (AGU={agu})")
         if not agu:
             raise RuntimeError(f"No dropdown student matched '{target}'")
 
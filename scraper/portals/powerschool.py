@@ -3,19 +3,20 @@ from typing import Any, Dict, Optional
 from bs4 import BeautifulSoup
 import re
 
-from scraper.portals.base import PortalEngine
+from scraper.portals.base import HTML_PARSER, PlaywrightError, PortalEngine
 from scraper.portals import register_portal
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from tenacity import retry, stop_after_attempt, wait_exponential, wait_random, retry_if_exception_type
 
 from .utils import canonicalize_course_title, universal_login_flow, wait_after_nav
 DASHES = r"[\u2010-\u2015]"  # hyphen–emdash range
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
 
 @register_portal("powerschool")
 class PowerSchool(PortalEngine):
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type(Exception),
+        wait=wait_exponential(multiplier=1, min=2, max=10) + wait_random(0, 1),
+        retry=retry_if_exception_type(PlaywrightError),
     )
     async def login(self, first_name: Optional[str] = None) -> None:
         username_selector = "#fieldAccount"
@@ -35,13 +36,13 @@ class PowerSchool(PortalEngine):
 
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type(Exception),
+        wait=wait_exponential(multiplier=1, min=2, max=10) + wait_random(0, 1),
+        retry=retry_if_exception_type(PlaywrightError),
     )
     async def fetch_grades(self) -> Dict[str, Any]:
         # grab full HTML
         html = await self.page.content()
-        parsed = self._parse_gradebook(html)
+        parsed = await self.parse_off_loop(self._parse_gradebook, html)
         print(parsed)
         return {"parsed_grades": parsed}
 
@@ -52,7 +53,7 @@ class PowerSchool(PortalEngine):
         Prefers the last <a class="bold">…</a> in each row (current term).
         Percentage → float, else letter.  N/A → "".
         """
-        soup = BeautifulSoup(html, "html.parser")
+        soup = BeautifulSoup(html, HTML_PARSER)
         results: Dict[str, Any] = {}
         table_selector = "tr[id^=ccid_]"
         # Select each student row by id starting with ccid_
@@ -76,7 +77,7 @@ class PowerSchool(PortalEngine):
                 if title in grades_text: # there may not be a grade here, bail
                     break
                 if len(grades) == 2:
-                    m = re.search(r"\d+(?:\.\d+)?", grades[1])  # handles 87 / 87.5 / 87%
+                    m = _NUMBER_RE.search(grades[1])  # handles 87 / 87.5 / 87%
                     grade = float(m.group(0)) if m else ("" if grades[0].upper() in ("N/A", "-", "") else grades[0])
                     break
             if grade:
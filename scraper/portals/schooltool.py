@@ -2,14 +2,14 @@ from __future__ import annotations
 from typing import Any, Dict, Optional
 from scraper.portals.base import PortalEngine, PlaywrightTimeout
 from scraper.portals import register_portal
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from tenacity import retry, stop_after_attempt, wait_exponential, wait_random, retry_if_exception_type
 
 from .utils import exists, grades_table_to_dict, universal_login_flow, wait_after_nav
 @register_portal("schooltool")
 class SchoolTool(PortalEngine):
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
+        wait=wait_exponential(multiplier=1, min=2, max=10) + wait_random(0, 1),
         retry=retry_if_exception_type(PlaywrightTimeout),
     )
     async def login(self, first_name: Optional[str] = None) -> None:
@@ -27,21 +27,23 @@ class SchoolTool(PortalEngine):
                 google_callback=self.google_login,
                 alt_sso_callback=self.alt_sso_login
             )
-            await wait_after_nav(self.page, wait_until='networkidle', wait_after_load=10000)
-            # navigate to the student records pag
+            await wait_after_nav(self.page, wait_until='domcontentloaded', wait_after_load=0)
+            # navigate to the student records pag (the exists() probe below waits for it)
             student_record_page_selector = 'font-icon[title="View Student Record"]'
             if await exists(self.page.locator(student_record_page_selector), timeout=15000):
                 if await self.page.locator(student_record_page_selector).is_visible():
-                    await self.page.click(student_record_page_selector)
-                    print('clicked student record page, waiting for nav...')
-                    await wait_after_nav(self.page, wait_after_load=5000)
+                    # Wait for the navigation the click starts, not the page we're leaving
+                    async with self.page.expect_navigation(wait_until='domcontentloaded', timeout=15000):
+                        await self.page.click(student_record_page_selector)
+                        print('clicked student record page, waiting for nav...')
 
                     # from here, nav to the grades table
                     grades_page_selector = 'a:has-text("Grades")'
                     if await exists(self.page.locator(grades_page_selector), timeout=5000):
-                        await self.page.click(grades_page_selector)         
-                        print('clicked grades page, waiting for nav...')   
-                        await wait_after_nav(self.page, wait_after_load=5000)
+                        # fetch_grades waits for the grades table itself
+                        async with self.page.expect_navigation(wait_until='domcontentloaded', timeout=15000):
+                            await self.page.click(grades_page_selector)
+                            print('clicked grades page, waiting for nav...')
             else:
                 print("Could not find student record page, may unable to fetch grades")
         except Exception as e:
@@ -53,7 +55,7 @@ class SchoolTool(PortalEngine):
 
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
+        wait=wait_exponential(multiplier=1, min=2, max=10) + wait_random(0, 1),
         retry=retry_if_exception_type(PlaywrightTimeout),
     )
     async def fetch_grades(self) -> Dict[str, Any]:
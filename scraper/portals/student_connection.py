@@ -1,26 +1,54 @@
 from __future__ import annotations
+import re
 from typing import Any, Dict, Optional
 
 from playwright.async_api import TimeoutError as PlaywrightTimeout
-from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential, wait_random
 
-from .base import PortalEngine
+from .base import OUTER_HTML_JS, PortalEngine
 from . import register_portal  # helper we'll create in __init__.py
 from .utils import (
+    TRACE_ENABLED,
     canonicalize_course_title,
     canonicalize_grade,
     exists,
+    start_tracing,
+    stop_tracing,
     universal_login_flow,
     wait_after_nav,
 )
 
+_PORTAL_MAIN_URL_RE = re.compile("PortalMainPage")
+# The parenthesized percent in "A (98%)", "P (100%)" or "(98%)", whatever the mark
+_PAREN_PCT_RE = re.compile(r"\(\s*(\d+(?:\.\d+)?)")
+# Header texts and per-row cell texts of a table in one round-trip
+_TABLE_TEXT_JS = """
+(sel) => {
+  const t = document.querySelector(sel);
+  if (!t) return null;
+  const text = c => (c.textContent || '').trim();
+  return {
+    head: Array.from(t.querySelectorAll('thead th'), text),
+    body: Array.from(t.querySelectorAll('tbody tr'), r => Array.from(r.querySelectorAll('td'), text)),
+  };
+}
+"""
+
+def _grade_from_cell_text(text: str) -> str:
+    """Prefer the parenthesized percent; with none, hand the mark itself to canonicalize_grade."""
+    m = _PAREN_PCT_RE.search(text)
+    return m.group(1) if m else text
+
+def _cell_text(cells: list[str], j: int | None) -> str:
+    return cells[j] if j is not None and 0 <= j < len(cells) else ""
+
 @register_portal("student_connection")
 class StudentConnection(PortalEngine):
     """Portal scraper for Student Connection."""
 
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=3, max=10),
+        wait=wait_exponential(multiplier=1, min=3, max=10) + wait_random(0, 1),
         retry=retry_if_exception_type(PlaywrightTimeout),
         reraise=True,
     )
@@ -28,6 +56,7 @@ class StudentConnection(PortalEngine):
         """Authenticate the user on the StudentConnection portal."""
         username_selector = "input[name='Pin']"
         password_selector = "input[name='Password']"
+        await start_tracing(self.page)
         try:
             await universal_login_flow(
                 self.page,
@@ -44,8 +73,8 @@ class StudentConnection(PortalEngine):
                 await self.raise_login_error_if(login_not_found)
             except PlaywrightTimeout: # not a failed login if this times out
                 pass
-            # Wait until the URL contains 'PortalMainPage' indicating successful login, then wait for network idle
-            await wait_after_nav(self.page, pattern=lambda url: "PortalMainPage" in url, wait_after_load=2000)
+            # Wait until the URL contains 'PortalMainPage' indicating successful login; fetch_grades waits for the Pulse table
+            await wait_after_nav(self.page, pattern=_PORTAL_MAIN_URL_RE, wait_after_load=0)
 
 
 
@@ -54,10 +83,10 @@ class StudentConnection(PortalEngine):
             print(e)
             raise
         finally:
-            await self.page.context.tracing.stop()
+            await stop_tracing(self.page, f"student_connection-login-{self.sid}")
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=3, max=10),
+        wait=wait_exponential(multiplier=1, min=3, max=10) + wait_random(0, 1),
         retry=retry_if_exception_type(PlaywrightTimeout),
     )
     async def fetch_grades(self) -> Dict[str, Any]:
@@ -68,8 +97,7 @@ class StudentConnection(PortalEngine):
         try:
             pulse = True  # default to using the pulse table
             # parsed: None | Dict[str, Any] = None
-            # Brief pause to allow initial widgets to paint
-            await self.page.wait_for_timeout(800)
+            await self.page.wait_for_load_state("domcontentloaded")
 
             # Try to ensure Pulse section is visible/expanded
             try:
@@ -78,8 +106,8 @@ class StudentConnection(PortalEngine):
                     expanded = await img_pulse.get_attribute("aria-expanded")
                     # Some builds use 'true'/'false', others omit; click if clearly collapsed
                     if expanded is not None and expanded.lower() in ("false", "collapsed"):
+                        # collect_from_pulse waits for the table rows
                         await img_pulse.click()
-                        await self.page.wait_for_timeout(400)
                 else:
                     pulse = False
             except Exception as e:
@@ -105,9 +133,8 @@ class StudentConnection(PortalEngine):
             pass
 # HELPERS
     async def collect_from_assignments(self) -> Dict[str, Any]:
-        soup = await self.get_soup()
-        assignments = soup.find('tr', id='trSP1_Assignments')
-        courses_table = assignments.find('div', id='SP_Assignments')
+        soup = await self.get_soup("#trSP1_Assignments #SP_Assignments")
+        courses_table = soup.find('div', id='SP_Assignments')
         courses = courses_table.find_all('table')
         parsed: Dict[str, Any] = {}
         for course in courses:
@@ -115,31 +142,30 @@ class StudentConnection(PortalEngine):
             course_name = course.find('caption') # get course name from the caption
             course_name = course_name.text.strip()
             # title formatting
-            try:
-                course_name = course_name[:course_name.index('(')]
-            except ValueError:
-                pass
+            course_name = course_name.partition('(')[0]
             if "Per" in course_name:
                 course_name = course_name[9:]
             # grade
             course.find('td').find('b').decompose() # get rid of the extra text in this element
-            grade = course.find('td').text.strip() # LIKE [A, 98] or [A]
-            grade_content = grade.split('(')
-            letter_grade_idx = 0
-            percent_grade_idx = 1
-            if len(grade_content) < 2:
-                grade = grade_content[letter_grade_idx]
-            else:
-                grade = grade_content[percent_grade_idx]
-
-            percent_grade = canonicalize_grade(grade)
-            print(grade_content)
+            grade = course.find('td').text.strip() # LIKE A (98%) or A
+            percent_grade = canonicalize_grade(_grade_from_cell_text(grade))
             print(course_name, percent_grade)
             truncate_on = ": "
             course_name = canonicalize_course_title(course_name, truncate_on=truncate_on, truncate_before=True)
             parsed[course_name] = percent_grade
         return parsed
 
+    async def _dump_pulse_html(self) -> None:
+        """Print the Pulse table's HTML for debugging; only when PW_TRACE is set."""
+        if not TRACE_ENABLED:
+            return
+        pulse = self.page.locator("#SP-Pulse")
+        if await pulse.count() == 0:
+            print("No #SP-Pulse element on the page")
+            return
+        html = await pulse.first.evaluate(OUTER_HTML_JS)
+        print(html[:4000])
+
     async def collect_from_pulse(self):
         # Wait for the Pulse table to exist in the DOM. If not, click left-menu "Pulse".
         try:
@@ -149,7 +175,6 @@ class StudentConnection(PortalEngine):
                 menu_pulse = self.page.locator("tr#Pulse, td.td2_action:has-text('Pulse')")
                 if await menu_pulse.count() > 0:
                     await menu_pulse.first.click()
-                    await self.page.wait_for_timeout(500)
                     await self.page.locator("#SP-Pulse").wait_for(state="attached", timeout=7_000)
             except Exception:
                 pass
@@ -167,63 +192,37 @@ class StudentConnection(PortalEngine):
                 timeout=4_000,
             )
         except PlaywrightTimeout:
-            html = await self.page.content()
-            print("Pulse table had no rows. Dumping snippet for debug…")
-            print(html[:4000])
+            print("Pulse table had no rows.")
+            await self._dump_pulse_html()
             return {}
 
+        table = await self.page.evaluate(_TABLE_TEXT_JS, "#SP-Pulse")
+        if table is None:
+            return {}
         # Map the header indices so we don’t rely on column order.
-        header_cells = self.page.locator("#SP-Pulse thead th")
-        header_count = await header_cells.count()
-        header_texts: list[str] = []
-        for i in range(header_count):
-            try:
-                t = await header_cells.nth(i).text_content()
-                header_texts.append((t or "").strip())
-            except Exception:
-                header_texts.append("")
+        header_texts: list[str] = table["head"]
 
-        def col_idx(name: str) -> int | None:
-            lname = name.lower()
-            for j, h in enumerate(header_texts):
-                if h.lower() == lname:
-                    return j
-            return None
+        # Built once; reversed so the first matching header wins, as a linear scan would
+        col_idx = {h.lower(): j for j, h in reversed(list(enumerate(header_texts)))}
 
-        idx_class = col_idx("Class")
-        idx_pct = col_idx("Pct")
-        idx_letter = col_idx("CurrentGrade")
+        idx_class = col_idx.get("class")
+        idx_pct = col_idx.get("pct")
+        idx_letter = col_idx.get("currentgrade")
 
         if idx_class is None or (idx_pct is None and idx_letter is None):
-            html = await self.page.content()
             print("Missing expected headers. Headers seen:", header_texts)
-            print(html[:4000])
+            await self._dump_pulse_html()
             return {}
 
-        # Extract rows
-        rows = self.page.locator("#SP-Pulse tbody tr")
-        n = await rows.count()
         parsed: Dict[str, Any] = {}
 
-        for r in range(n):
-            cells = rows.nth(r).locator("td")
-            ccount = await cells.count()
-            if ccount == 0:
+        for cells in table["body"]:
+            if not cells:
                 continue
 
-            async def safe_text(j: int | None) -> str:
-                if j is None or j < 0 or j >= ccount:
-                    return ""
-                try:
-                    text = await cells.nth(j).text_content()
-                    return (text or "").strip()
-                except Exception as e:
-                    print(e)
-                    return ""
-
-            course = (await safe_text(idx_class)).upper()
-            pct_s = await safe_text(idx_pct) if idx_pct is not None else ""
-            letter = await safe_text(idx_letter) if idx_letter is not None else ""
+            course = _cell_text(cells, idx_class).upper()
+            pct_s = _cell_text(cells, idx_pct)
+            letter = _cell_text(cells, idx_letter)
 
             # Normalize percentage: "82.0%" → 82.0
             if pct_s:
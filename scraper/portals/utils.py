@@ -1,23 +1,30 @@
 from __future__ import annotations
 
 import asyncio
+import logging
+import os
+import pathlib
 import re
 from contextlib import asynccontextmanager
 from datetime import date, datetime, time, timedelta
 from typing import Callable, Dict, List, Literal, Optional, Pattern, Tuple
+from urllib.parse import urlsplit
 
 from bs4 import BeautifulSoup, Tag
 from playwright.async_api import Error as PlaywrightError
-from playwright.async_api import Frame, Locator, Page, expect
+from playwright.async_api import BrowserContext, Frame, Locator, Page, Route, expect
 from playwright.async_api import TimeoutError as PlaywrightTimeout
 from tenacity import (
     retry,
     retry_if_exception_type,
     stop_after_attempt,
-    wait_exponential,
+    wait_exponential, wait_random,
 )
 
 from . import LoginError
+from .base import HTML_PARSER, OUTER_HTML_JS
+
+logger = logging.getLogger(__name__)
 
 
 def get_portal_key_from_url(url: str) -> str | None:
@@ -44,14 +51,14 @@ def get_portal_key_from_url(url: str) -> str | None:
 # Standard retry configurations
 standard_login_retry = retry(
     stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=4, max=10),
+    wait=wait_exponential(multiplier=1, min=4, max=10) + wait_random(0, 1),
     retry=retry_if_exception_type(PlaywrightTimeout),
     reraise=True,
 )
 
 standard_fetch_retry = retry(
     stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=2, max=10),
+    wait=wait_exponential(multiplier=1, min=2, max=10) + wait_random(0, 1),
     retry=retry_if_exception_type(PlaywrightTimeout),
 )
 
@@ -60,20 +67,93 @@ standard_fetch_retry = retry(
 # ============================================================================
 
 
+# Screenshot/snapshot tracing writes a multi-MB zip per student, so it is opt-in:
+# PW_TRACE=1 turns it on and traces land in PW_TRACE_DIR.
+TRACE_ENABLED = os.getenv("PW_TRACE", "").strip().lower() in {"1", "true", "yes", "on"}
+TRACE_DIR = pathlib.Path(os.getenv("PW_TRACE_DIR", "output/traces"))
+
+
+async def start_tracing(page: Page) -> None:
+    """Start screenshot/snapshot tracing on the page's context when PW_TRACE is set."""
+    if not TRACE_ENABLED:
+        return
+    try:
+        await page.context.tracing.start(screenshots=True, snapshots=True)
+    except PlaywrightError as e:  # already tracing, e.g. a nested engine's login on the same context
+        logger.debug("tracing not started: %s", e)
+
+
+async def stop_tracing(page: Page, name: Optional[str] = None) -> None:
+    """
+    Stop tracing started by `start_tracing`; a no-op unless PW_TRACE is set.
+
+    Args:
+        page: Playwright Page object
+        name: Saves the trace as TRACE_DIR/<name>.zip; the trace is discarded if omitted
+    """
+    if not TRACE_ENABLED:
+        return
+    path = None
+    if name:
+        TRACE_DIR.mkdir(parents=True, exist_ok=True)
+        path = TRACE_DIR / f"{name}.zip"
+    try:
+        await page.context.tracing.stop(path=path)
+    except PlaywrightError as e:  # not tracing (an outer/inner login already stopped it)
+        logger.debug("tracing not stopped: %s", e)
+
+
 @asynccontextmanager
-async def tracing_context(page: Page):
+async def tracing_context(page: Page, name: Optional[str] = None):
     """
-    Context manager for Playwright tracing.
+    Context manager for Playwright tracing (only records when PW_TRACE is set).
 
     Usage:
-        async with tracing_context(self.page):
+        async with tracing_context(self.page, "aeries-login"):
             # login/fetch logic
     """
-    await page.context.tracing.start(screenshots=True, snapshots=True)
+    await start_tracing(page)
     try:
         yield
     finally:
-        await page.context.tracing.stop()
+        await stop_tracing(page, name)
+
+
+# Analytics/ad beacons no portal flow depends on
+_TRACKER_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "hotjar.com",
+    "newrelic.com",
+    "nr-data.net",
+)
+
+
+def _is_tracker(url: str) -> bool:
+    host = urlsplit(url).hostname or ""
+    return any(host == t or host.endswith("." + t) for t in _TRACKER_HOSTS)
+
+
+async def block_resources(context: BrowserContext, resource_types: frozenset[str]) -> None:
+    """
+    Abort requests whose resource type is in `resource_types`, plus known analytics
+    hosts, for every page in `context`. An empty `resource_types` blocks nothing.
+
+    Usage:
+        await block_resources(context, Engine.BLOCKED_RESOURCES)
+    """
+    if not resource_types:
+        return
+
+    async def _handle(route: Route):
+        request = route.request
+        if request.resource_type in resource_types or _is_tracker(request.url):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await context.route("**/*", _handle)
 
 
 async def exists(elem: Locator, timeout: int = 1000):
@@ -381,22 +461,23 @@ async def select_student_from_dropdown(
     await page.wait_for_selector(items_selector)
 
     items = page.locator(items_selector)
-    n = await items.count()
+    # One round-trip for every item's name (kept index-aligned with `items`)
+    names = await items.evaluate_all(
+        "(els, sel) => els.map(e => { const n = e.querySelector(sel); return n ? n.innerText : ''; })",
+        name_selector,
+    )
 
     search_name = first_name if case_sensitive else first_name.lower()
+    if not case_sensitive:
+        names = [name.lower() for name in names]
 
-    for i in range(n):
-        item = items.nth(i)
-        name_elem = item.locator(name_selector)
-        name = await name_elem.inner_text()
-        compare_name = name.strip() if case_sensitive else name.strip().lower()
-
-        if search_name in compare_name:
-            await item.click()
-            await page.wait_for_timeout(wait_after_click)
-            return True
+    match = next((i for i, name in enumerate(names) if search_name in name), None)
+    if match is None:
+        return False
 
-    return False
+    await items.nth(match).click()
+    await page.wait_for_timeout(wait_after_click)
+    return True
 
 
 # ============================================================================
@@ -431,12 +512,10 @@ def truncate_title(title: str, truncate_on: str, truncate_before: bool) -> str:
     Return:
         The new truncated string
     """
-    if truncate_on in title:
-        if truncate_before:
-            return title[title.index(truncate_on) + 1 :].strip()
-
-        return title[: title.index(truncate_on)].strip()
-    return title
+    head, sep, tail = title.partition(truncate_on)
+    if not sep:
+        return title
+    return (tail if truncate_before else head).strip()
 
 
 def canonicalize_course_title(
@@ -447,6 +526,15 @@ def canonicalize_course_title(
     return title.strip().upper()
 
 
+# [title innerText | null, [grade cell innerTexts]] for each row matched by the table selector
+_ROW_TEXTS_JS = """
+(rows, [titleSel, gradeSel]) => rows.map(row => {
+  const title = row.querySelector(titleSel);
+  return [title ? title.innerText : null, Array.from(row.querySelectorAll(gradeSel), g => g.innerText)];
+})
+"""
+
+
 async def grades_table_to_dict(
     page: Page | Frame,
     table_selector: str,
@@ -455,6 +543,7 @@ async def grades_table_to_dict(
     *,
     pair_selector: str | None = None,
     frame_selector: str | None = None,
+    scope_selector: str | None = None,
     truncate_title_on: str | None = None,
     should_truncate_before: bool = False,
     decompose_labels: bool = False,
@@ -470,6 +559,7 @@ async def grades_table_to_dict(
         grade_selector: CSS selector for the value column (e.g., grade)
         pair_selector: CSS selector for a pairing, when classes are not contained within the same element
         frame_selector: CSS selector for a frame object
+        scope_selector: CSS selector for an element enclosing the table; only its HTML is pulled from the page (soup parsing only)
         truncate_title_on: String to cut the course title at
         should_truncate_before: Determines if we should cut off the string before the target or after; after is default
         decompose_labels: Bool determining whether to decompose labels from tags or not
@@ -483,8 +573,11 @@ async def grades_table_to_dict(
     """
     assert isinstance(page, Page)
     if use_soup:  # bs4 parsing (default)
-        html = await page.content()
-        soup = BeautifulSoup(html, "html.parser")
+        if scope_selector is not None:
+            html = await page.locator(scope_selector).first.evaluate(OUTER_HTML_JS)
+        else:
+            html = await page.content()
+        soup = BeautifulSoup(html, HTML_PARSER)
 
         table = soup.select(table_selector)
         if not table:
@@ -521,13 +614,17 @@ async def grades_table_to_dict(
             assert frame is not None, f"Could not find frame with selector {frame_selector}"
             page = frame
         parsed = {}
-        rows = await page.locator(f"{table_selector}").all()
+        # Every row's title and grade cell texts in a single round-trip
+        rows = await page.locator(table_selector).evaluate_all(
+            _ROW_TEXTS_JS, [title_selector, grade_selector]
+        )
         # print(f"Found {len(rows)} courses")
-        for row in rows:
+        for raw_title, grades in rows:
             try:
-                class_title = (await row.locator(title_selector).inner_text()).strip()
+                if raw_title is None:
+                    continue
+                class_title = raw_title.strip()
                 # print("Checking class: " + class_title)
-                grades = await row.locator(grade_selector).all()
 
                 if len(grades) == 0:
                     # print("no grade info")
@@ -536,7 +633,7 @@ async def grades_table_to_dict(
                 if len(grades) > 1:
                     grade_text: str | None = None
                     for grade in reversed(grades):
-                        text = (await grade.inner_text()).strip()
+                        text = grade.strip()
                         if (
                             "%" in text
                         ):  # this does not catch all, like cases when there is a number but no percentage sign
@@ -548,20 +645,17 @@ async def grades_table_to_dict(
                             grade_text = text
                             break
                     if grade_text is None:  # bail if we couldn't find a valid grade
-                        print("no percentage grade found")
+                        logger.debug("no percentage grade found for %s", class_title)
                         continue
                 else:  # there is only one element in the grades
-                    grade_text = (await grades[0].inner_text()).strip()
+                    grade_text = grades[0].strip()
 
                 grade = canonicalize_grade(grade_text)
                 if grade:
                     parsed[class_title.upper()] = grade
-            except (PlaywrightError, PlaywrightTimeout) as e:
-                print(f"{type(e)}: {e}")
-                continue
             except Exception as e:
-                print(f"{type(e)}: {e}")
-    print(parsed)
+                logger.warning("%s: %s", type(e), e)
+    logger.debug("parsed grades: %s", parsed)
     return parsed
 
 
@@ -569,6 +663,11 @@ def normalize_whitespace(text: str) -> str:
     return " ".join(text.split())
 
 
+_LETTER_BASE = {"A": 95, "B": 84, "C": 74, "D": 64, "F": 55}
+_GRADE_STRIP_TRANS = str.maketrans("", "", "%()")
+_MODIFIER_STRIP_TRANS = str.maketrans("", "", "+-")
+
+
 def percent_from_letter_grade(letter_grade: str) -> int:
     """
     Converts letter grades like 'A', 'C+' to a number that represents it
@@ -576,27 +675,11 @@ def percent_from_letter_grade(letter_grade: str) -> int:
     Args:
         letter_grade
     """
-    minus = letter_grade.endswith("-")
-    plus = letter_grade.endswith("+")
-    modifier = -5 if minus else 5 if plus else 0
-    grade = 95
+    modifier = -5 if letter_grade.endswith("-") else 5 if letter_grade.endswith("+") else 0
     if modifier != 0:
-        letter_grade = letter_grade.replace("-", "")
-        letter_grade = letter_grade.replace("+", "")
-    match letter_grade:
-        case "A":
-            pass
-        case "B":
-            grade -= 11  # 89
-        case "C":
-            grade -= 21  # 79
-        case "D":
-            grade -= 31  # 69
-        case "F":
-            grade -= 40  # 60
-        case _:
-            grade = -1
-    return grade + modifier if grade > 0 else grade
+        letter_grade = letter_grade.translate(_MODIFIER_STRIP_TRANS)
+    base = _LETTER_BASE.get(letter_grade)
+    return base + modifier if base is not None else -1
 
 
 def canonicalize_grade(grade_text: str) -> float | None:
@@ -610,9 +693,8 @@ def canonicalize_grade(grade_text: str) -> float | None:
         float: Numeric percentage grade
     """
     grade_text = grade_text.strip()
-    try:  # Remove % sign if present
-        if "%" or "(" or ")" in grade_text.strip():
-            return float(grade_text.replace("%", "").replace("(", "").replace(")", ""))
+    try:  # Remove % sign and parentheses if present
+        return float(grade_text.translate(_GRADE_STRIP_TRANS))
     except ValueError:  # NaN
         pass
     # Maybe a letter grade
@@ -686,22 +768,35 @@ _MONTHS = {
 }
 
 
+# Narrow no-break spaces become spaces; zero-width characters are dropped.
+_CLEAN_TRANS = str.maketrans({"\u202f": " ", "\u00a0": " ", "\u200b": None, "\u200c": None, "\u200d": None})
+_WS_RE = re.compile(r"\s+")
+_TIME_RE = re.compile(r"\b(\d{1,2})(?::(\d{2}))?\s*([ap]\.?\s*m\.?)\b")
+_NOT_AMPM_RE = re.compile(r"[^apm]")
+_WEEKDAY_RE = re.compile(r"\b(monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b")
+_MONTH_DAY_RE = re.compile(
+    r"\b("
+    r"jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|jun(?:e)?|jul(?:y)?|"
+    r"aug(?:ust)?|sep(?:t|tember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?"
+    r")\.?\s+(\d{1,2})\b"
+)
+_RELATIVE_DAY_RE = re.compile(r"\b(tomorrow|today|yesterday)\b")
+_RELATIVE_DAYS = {"tomorrow": 1, "today": 0, "yesterday": -1}
+
+
 def _clean(s: str) -> str:
-    s = s.replace("\u202f", " ").replace("\u00a0", " ")
-    s = re.sub(r"[\u200b\u200c\u200d]", "", s)
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+    return _WS_RE.sub(" ", s.translate(_CLEAN_TRANS)).strip()
 
 
 def _parse_time_anywhere(s: str) -> Optional[time]:
     s = _clean(s).lower()
-    m = re.search(r"\b(\d{1,2})(?::(\d{2}))?\s*([ap]\.?\s*m\.?)\b", s)
+    m = _TIME_RE.search(s)
     if not m:
         return None
 
     hh = int(m.group(1))
     mm = int(m.group(2) or "0")
-    ampm = re.sub(r"[^apm]", "", m.group(3))  # "a.m." -> "am"
+    ampm = _NOT_AMPM_RE.sub("", m.group(3))  # "a.m." -> "am"
     if not (1 <= hh <= 12) or not (0 <= mm <= 59):
         return None
 
@@ -714,19 +809,13 @@ def _parse_time_anywhere(s: str) -> Optional[time]:
 
 def _find_weekday(s: str) -> Optional[int]:
     s = _clean(s).lower()
-    m = re.search(r"\b(monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b", s)
+    m = _WEEKDAY_RE.search(s)
     return _WEEKDAYS[m.group(1)] if m else None
 
 
 def _find_month_day(s: str) -> Optional[Tuple[int, int]]:
     s = _clean(s).lower().replace(",", " ").replace(";", " ")
-    m = re.search(
-        r"\b("
-        r"jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|jun(?:e)?|jul(?:y)?|"
-        r"aug(?:ust)?|sep(?:t|tember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?"
-        r")\.?\s+(\d{1,2})\b",
-        s,
-    )
+    m = _MONTH_DAY_RE.search(s)
     if not m:
         return None
     month = _MONTHS[m.group(1)]
@@ -742,12 +831,10 @@ def _find_relative_day(s: str) -> Optional[int]:
       yesterday -> -1, today -> 0, tomorrow -> +1
     """
     s = _clean(s).lower()
-    if re.search(r"\btomorrow\b", s):
-        return 1
-    if re.search(r"\btoday\b", s):
-        return 0
-    if re.search(r"\byesterday\b", s):
-        return -1
+    words = {m.group(1) for m in _RELATIVE_DAY_RE.finditer(s)}
+    for word in ("tomorrow", "today", "yesterday"):
+        if word in words:
+            return _RELATIVE_DAYS[word]
     return None
 
 
@@ -1,6 +1,8 @@
 import json
 from pathlib import Path
 
+import orjson
+
 def process_grades(input_path: Path, output_path: Path):
     """
     Reads raw grade data from a JSONL file, processes it into a unified
@@ -15,10 +17,10 @@ def process_grades(input_path: Path, output_path: Path):
         return
 
     processed_data = {}
-    with open(input_path, 'r') as f:
+    with open(input_path, 'r', encoding='utf-8') as f:  # orjson writes raw UTF-8, not ASCII escapes
         for line in f:
             try:
-                data = json.loads(line)
+                data = orjson.loads(line)
                 student_id = data.get("db_id")
                 grades = data.get("grades", {}).get("parsed_grades", [])
                 if not student_id or not grades:
@@ -49,7 +51,7 @@ def process_grades(input_path: Path, output_path: Path):
 
                 if student_grades:
                     processed_data[student_id] = student_grades
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 print(f"Warning: Could not decode JSON from line: {line.strip()}")
             except (AttributeError, TypeError) as e:
                 print(f"Warning: Could not process line due to unexpected structure: {line.strip()} - Error: {e}")
@@ -2,7 +2,6 @@
 # builtins
 import argparse
 import asyncio
-import json
 import os
 import pathlib
 import pprint
@@ -21,11 +20,12 @@ from sqlalchemy.engine import Connection
 from sqlalchemy.exc import SQLAlchemyError
 
 # external
+import orjson
 from playwright.async_api import Browser, async_playwright
 
 from scraper.notif import Severity, send_notification_to_slack
 from scraper.portals import LoginError, get_portal, managed_portals
-from scraper.portals.utils import get_portal_key_from_url
+from scraper.portals.utils import block_resources, get_portal_key_from_url
 
 load_dotenv()
 print("[runner] module import OK", flush=True)
@@ -69,12 +69,9 @@ def _load_student_auth_map(conn: Connection) -> Dict[int, dict]:
     """
     rows = conn.exec_driver_sql(
         "SELECT studentid, authtype, answers FROM student_auth"
-    ).mappings().all()
+    ).all()
     out: Dict[int, dict] = {}
-    for row in rows:
-        sid = row["studentid"]
-        auth_type = row["authtype"]
-        answers_raw = row["answers"]
+    for sid, auth_type, answers_raw in rows:
         answers_raw = (answers_raw or "").strip("{}")
         answers = [a.strip('" ').strip() for a in answers_raw.split(",") if a.strip()]
         out[sid] = {"type": auth_type, "answers": answers}
@@ -127,14 +124,17 @@ def get_students_from_db(
             query = base + " WHERE " + " AND ".join(conditions)
             print("[runner] SQL:", query, flush=True)
             print("[runner] SQL params:", params, flush=True)
-            rows = conn.exec_driver_sql(query, tuple(params)).mappings().all()
+            rows = conn.exec_driver_sql(query, tuple(params)).all()
 
             want_portal = (portal or "").strip().lower() or None
 
             print(f"[runner] fetched {len(rows)} Student rows", flush=True)
-            for row in rows:
-                login_url = row["portal1"]
-                portal_raw = row["portal"]
+            flagged_bad = False
+            for (
+                db_id, first_name, p1_username, p1_password, login_url,
+                p2_username, p2_password, alt_login_url, portal_raw,
+                _year_start, _year_end, password_good, _franchise_id, track_agenda, row_status,
+            ) in rows:
                 portal_key = (portal_raw or "").strip().lower()
                 if not portal_key:
                     portal_key = get_portal_key_from_url(login_url) or ""
@@ -142,7 +142,7 @@ def get_students_from_db(
                 if want_portal and portal_key != want_portal:
                     continue
 
-                auth = student_auth_map.get(row["id"])
+                auth = student_auth_map.get(db_id)
                 auth_images = (
                     auth["answers"]
                     if auth and auth["type"] == "gps_pictograph"
@@ -151,30 +151,34 @@ def get_students_from_db(
 
                 if not portal_key:
                     print(
-                        f"[WARN] Skipping ID={row['id']}: missing portal (login_url={login_url!r})",
+                        f"[WARN] Skipping ID={db_id}: missing portal (login_url={login_url!r})",
                         flush=True,
                     )
-                    bad_login(row["id"])
+                    bad_login(db_id, conn)
+                    flagged_bad = True
                     continue
 
                 students_list.append(
                     {
-                        "db_id": row["id"],
-                        "student_name": row["firstname"],
+                        "db_id": db_id,
+                        "student_name": first_name,
                         "login_url": login_url,
-                        "id": row["p1username"],
-                        "password": row["p1password"],
-                        "alt_login_url": row["portal2"],
-                        "alt_id": row["p2username"],
-                        "alt_password": row["p2password"],
+                        "id": p1_username,
+                        "password": p1_password,
+                        "alt_login_url": alt_login_url,
+                        "alt_id": p2_username,
+                        "alt_password": p2_password,
                         "portal": portal_key,
                         "auth_images": auth_images,
-                        "track_agenda": row["track_agenda"],
-                        "status": row["status"],
-                        "passwordgood": row["passwordgood"],
+                        "track_agenda": track_agenda,
+                        "status": row_status,
+                        "passwordgood": password_good,
                     }
                 )
 
+            if flagged_bad:
+                conn.commit()
+
     except SQLAlchemyError as e:
         print(f"Database error: {e}", file=sys.stderr, flush=True)
         sys.exit(1)
@@ -202,41 +206,48 @@ def students(
     )
 
 
-def bad_login(student_id: int):
-    """Set PasswordGood=0 for a student in the database."""
+def bad_login(student_id: int, conn: Connection | None = None):
+    """Set PasswordGood=0 for a student in the database.
+
+    Pass an open `conn` to reuse it; the caller is then responsible for committing.
+    """
     print(
         f"[runner] bad_login(): setting PasswordGood=0 for student ID={student_id}",
         flush=True,
     )
-    with db_conn() as conn:
+    if conn is not None:
         conn.exec_driver_sql("UPDATE Student SET PasswordGood = 0 WHERE ID = %s", (student_id,))
-        conn.commit()
+        return
+    with db_conn() as own_conn:
+        own_conn.exec_driver_sql("UPDATE Student SET PasswordGood = 0 WHERE ID = %s", (student_id,))
+        own_conn.commit()
 
 
 async def scrape_one(browser: Browser, student: dict):
     """Scrape a single student using the appropriate portal engine."""
     await asyncio.sleep(random.uniform(0, 1.0))
-    context = await browser.new_context()
-
-    page = await context.new_page()
-    page.set_default_timeout(15_000)
-    page.set_default_navigation_timeout(15_000)
-
     Engine = get_portal(student["portal"])
-    scraper = Engine(
-        page,
-        student["id"],
-        student["password"],
-        student_name=student.get("student_name"),
-        login_url=student["login_url"],
-        alt_portal_url=student.get("alt_login_url"),
-    )
+    context = await browser.new_context()
+    try:  # setup included, so a failed new_page/constructor still closes the context
+        await block_resources(context, Engine.BLOCKED_RESOURCES)
+
+        page = await context.new_page()
+        page.set_default_timeout(15_000)
+        page.set_default_navigation_timeout(15_000)
+
+        scraper = Engine(
+            page,
+            student["id"],
+            student["password"],
+            student_name=student.get("student_name"),
+            login_url=student["login_url"],
+            alt_portal_url=student.get("alt_login_url"),
+        )
 
-    if student.get("auth_images") and student["portal"] == "gps":
-        print(f"Setting auth_images for student ID={student['db_id']}: {student['auth_images']}", flush=True)
-        setattr(scraper, "auth_images", student["auth_images"])
+        if student.get("auth_images") and student["portal"] == "gps":
+            print(f"Setting auth_images for student ID={student['db_id']}: {student['auth_images']}", flush=True)
+            setattr(scraper, "auth_images", student["auth_images"])
 
-    try:
         print(f"Starting login for {student['id']}", flush=True)
         try:
             if not scraper.sid or not scraper.pw:
@@ -245,10 +256,11 @@ async def scrape_one(browser: Browser, student: dict):
                 )
             await scraper.login(first_name=student.get("student_name"))
         except ValueError:
-            bad_login(int(student["db_id"]))
+            # Sync DB write; keep it off the loop the other students' scrapes share
+            await asyncio.to_thread(bad_login, int(student["db_id"]))
             raise
         except Exception as e:
-            bad_login(int(student["db_id"]))
+            await asyncio.to_thread(bad_login, int(student["db_id"]))
             print(
                 f"[RUNNER] Invalid credentials for ID={student['db_id']}; PasswordGood set to 0"
             )
@@ -272,7 +284,6 @@ async def scrape_one(browser: Browser, student: dict):
 
         return {"db_id": student["db_id"], "id": student["id"], "parsed_grades": parsed}
     finally:
-        await page.close()
         await context.close()
 
 
@@ -284,9 +295,16 @@ def project_root() -> pathlib.Path:
     return pathlib.Path.cwd()
 
 
+# Students scraped at once; each gets its own context on the shared browser.
+SCRAPE_CONCURRENCY = max(1, int(os.getenv("SCRAPE_CONCURRENCY", "6")))
+# Headed by default (some portals gate on headless Chromium); SCRAPE_HEADLESS=1 for servers.
+SCRAPE_HEADLESS = os.getenv("SCRAPE_HEADLESS", "").strip().lower() in {"1", "true", "yes", "on"}
+
 out_dir = pathlib.Path("output/phase1totuples")
 out_dir.mkdir(parents=True, exist_ok=True)
 out_file = project_root() / out_dir / "grades.jsonl"
+# json.dumps accepted non-str dict keys; keep accepting them
+_JSONL_OPTS = orjson.OPT_NON_STR_KEYS
 
 
 async def main(
@@ -336,39 +354,51 @@ async def main(
     portal_attempted = {portal: 0 for portal in managed_portals.keys()}
     portal_success = {portal: 0 for portal in managed_portals.keys()}
     errors = []
-    with open(out_file, "w", encoding="utf-8") as f:
+    # Flushed per record: a killed run keeps every result scraped so far
+    with open(out_file, "wb") as f:
         async with async_playwright() as p:
             begin_time = time()
             browser_args = ["--disable-blink-features=AutomationControlled"]
-            browser = await p.chromium.launch(headless=False, args=browser_args)
-            for student in student_list:
-                portal_attempted[student.get("portal")] += 1
-                try:
+            browser = await p.chromium.launch(headless=SCRAPE_HEADLESS, args=browser_args)
+            sem = asyncio.Semaphore(SCRAPE_CONCURRENCY)
+
+            async def run_one(student: dict):
+                async with sem:
+                    portal_attempted[student.get("portal")] += 1
                     print(
                         f"Attempting to scrape {student['id']}... [{sum(portal_attempted.values())} / {len(student_list)}]",
                         flush=True,
                     )
-                    result = await scrape_one(browser, student)
-                    f.write(json.dumps(result) + "\n")
+                    try:
+                        return student, await scrape_one(browser, student), None
+                    except Exception as e:
+                        return student, None, e
+
+            tasks = [asyncio.create_task(run_one(student)) for student in student_list]
+            for next_done in asyncio.as_completed(tasks):
+                student, result, e = await next_done
+                if e is None:
+                    f.write(orjson.dumps(result, option=_JSONL_OPTS) + b"\n")
+                    f.flush()
                     portal_success[student.get("portal")] += 1
                     if state and state_q:
                         state.next_step()
                         state_q.put((job_id, state))
                     print(
-                        f"SUCCESS: {student['id']}, [{sum(portal_attempted.values())} / {len(student_list)}]",
+                        f"SUCCESS: {student['id']}, [{sum(portal_success.values())} / {len(student_list)}]",
                         flush=True,
                     )
-                except Exception as e:
-                    if "Connection closed while reading from the driver" not in str(e):
-                        error_result = {
-                            "db_id": student["db_id"],
-                            "student_id": student["id"],
-                            "error": f"{type(e).__name__}: {e}",
-                            "traceback": format_exception_only(type(e), e),
-                        }
-                        f.write(json.dumps(error_result) + "\n")
-                        errors.append(error_result)
-                        print(f"ERROR: {student['id']} (details in grades.jsonl)", flush=True)
+                elif "Connection closed while reading from the driver" not in str(e):
+                    error_result = {
+                        "db_id": student["db_id"],
+                        "student_id": student["id"],
+                        "error": f"{type(e).__name__}: {e}",
+                        "traceback": format_exception_only(type(e), e),
+                    }
+                    f.write(orjson.dumps(error_result, option=_JSONL_OPTS) + b"\n")
+                    f.flush()
+                    errors.append(error_result)
+                    print(f"ERROR: {student['id']} (details in grades.jsonl)", flush=True)
 
             end_time = time()
     time_elapsed = int(end_time - begin_time)
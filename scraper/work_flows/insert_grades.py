@@ -1,6 +1,8 @@
 # scraper/work_flows/insert_grades.py
-import json
+import os
 import pathlib
+
+import orjson
 from sqlalchemy.exc import SQLAlchemyError
 
 from scraper.runner import db_conn, project_root
@@ -11,6 +13,13 @@ print(f"Project root: {PROJECT_ROOT}")
 
 JSONL_PATH = PROJECT_ROOT / "output/phase1totuples/grades.jsonl"
 
+PROGRESS_EVERY = 100  # students per WeeklyData batch, one progress line each
+
+# One-shot re-imports can trade durability for speed: with this set, the
+# transaction commits without waiting for the WAL flush (Postgres only; a crash
+# may lose the last few hundred ms of writes, never corrupts).
+ASYNC_COMMIT = os.getenv("INSERT_GRADES_ASYNC_COMMIT", "").strip().lower() in {"1", "true", "yes", "on"}
+
 def get_monday_anchor() -> str:
     today = date.today()
     monday = today - timedelta(days=today.weekday())
@@ -23,7 +32,7 @@ def safe_load_json(value):
         return value
     if isinstance(value, str):
         try:
-            parsed = json.loads(value)
+            parsed = orjson.loads(value)
             return parsed if isinstance(parsed, dict) else {}
         except Exception:
             return {}
@@ -52,14 +61,18 @@ def insert_grades():
     print(f"Input: {JSONL_PATH}")
     try:
         with db_conn() as conn, open(JSONL_PATH, "r", encoding="utf-8") as f:
+            if ASYNC_COMMIT:
+                conn.exec_driver_sql("SET LOCAL synchronous_commit TO OFF")
+            pending: list[tuple[int, dict]] = []  # (student_id, grades) in file order
+            status_rows: list[tuple[int, str, str | None]] = []
             for raw in f:
                 raw = raw.strip()
                 if not raw:
                     continue
 
                 try:
-                    data = json.loads(raw)
-                except json.JSONDecodeError:
+                    data = orjson.loads(raw)
+                except orjson.JSONDecodeError:
                     print(f"Skipping non-JSON line: {raw[:120]}…")
                     continue
 
@@ -67,7 +80,7 @@ def insert_grades():
                 # Skip error payloads
                 if "error" in data:
                     print(f"Skipping error entry for {data.get('id')}: {data.get('error')}")
-                    update_status(conn, student_id, "error", error_msg=data['error'])
+                    status_rows.append((student_id, "error", data['error']))
                     continue
 
                 # Accept both NEW and OLD shapes:
@@ -78,31 +91,48 @@ def insert_grades():
                     grades = data["grades"].get("parsed_grades")
                 if not isinstance(grades, dict) or not grades:
                     print(f"Skipping line (missing student_id or parsed_grades): {raw[:120]}…")
-                    update_status(conn, student_id, "missing grades")
+                    status_rows.append((student_id, "missing grades", None))
                     continue
 
-                # Fetch existing WeeklyData
-                row = conn.exec_driver_sql(
-                    "SELECT WeeklyData FROM Student WHERE ID = %s",
-                    (student_id,)
-                ).mappings().fetchone()
-                if not row:
+                pending.append((student_id, grades))
+                # Recorded here to keep file order; dropped below if the student isn't found
+                status_rows.append((student_id, "synced", None))
+
+            # Fetch existing WeeklyData for every student in one round-trip
+            existing: dict[int, dict] = {}
+            if pending:
+                rows = conn.exec_driver_sql(
+                    "SELECT ID, WeeklyData FROM Student WHERE ID = ANY(%s)",
+                    (list({sid for sid, _ in pending}),)
+                ).mappings().all()
+                # Postgres JSON columns may come back as either a string or a native dict.
+                existing = {row["id"]: safe_load_json(row["weeklydata"]) for row in rows}
+
+            updated: dict[int, dict] = {}
+            not_found: set[int] = set()
+            for student_id, grades in pending:
+                weekly_data = updated.get(student_id, existing.get(student_id))
+                if weekly_data is None:
                     print(f"Student with ID '{student_id}' not found.")
+                    not_found.add(student_id)
                     continue
 
-                # Postgres JSON columns may come back as either a string or a native dict.
-                weekly_data = safe_load_json(row["weeklydata"])
-
                 # Update current week's bucket
                 weekly_data[monday_anchor] = grades
-                # Persist
-                conn.exec_driver_sql(
-                    "UPDATE Student SET WeeklyData = %s WHERE ID = %s",
-                    (json.dumps(weekly_data, ensure_ascii=False), student_id)
-                )
-                update_status(conn, student_id, 'synced')
-                print(f"Updated student ID {student_id} for week {monday_anchor} with {len(grades)} courses.")
-
+                updated[student_id] = weekly_data
+
+            # Persist in executemany batches, reporting after each one reaches the DB
+            weekly_rows = [(orjson.dumps(wd).decode(), sid) for sid, wd in updated.items()]
+            for start in range(0, len(weekly_rows), PROGRESS_EVERY):
+                batch = weekly_rows[start:start + PROGRESS_EVERY]
+                conn.exec_driver_sql("UPDATE Student SET WeeklyData = %s WHERE ID = %s", batch)
+                print(f"... {start + len(batch)}/{len(weekly_rows)} students written", flush=True)
+            print(f"Updated {len(updated)} students for week {monday_anchor}.")
+            if not_found:
+                status_rows = [
+                    row for row in status_rows if not (row[1] == "synced" and row[0] in not_found)
+                ]
+            update_statuses(conn, status_rows)
             conn.commit()
 
     except FileNotFoundError:
@@ -113,11 +143,22 @@ def insert_grades():
 def update_status(cur, student_id: int, status: str, error_msg: str | None = None):
     """ Modifies a students update status (synced, missing grades, error) in the database
         If the status is 'error' we will update the error_msg field in the database"""
-    cur.exec_driver_sql("update student set status = %s where ID = %s", (status, student_id,))
-    if status == 'error':
-        cur.exec_driver_sql("update student set error_msg = %s where ID = %s", (error_msg, student_id,))
-    else:
-        cur.exec_driver_sql("update student set error_msg = NULL where ID = %s", (student_id,))
+    update_statuses(cur, [(student_id, status, error_msg)])
+
+def update_statuses(cur, rows: list[tuple[int, str, str | None]]):
+    """ Batched update_status: rows are (student_id, status, error_msg), sent as one
+        executemany per statement instead of two round-trips per student.
+        When a student appears more than once, the last row wins, as it did per line"""
+    if not rows:
+        return
+    latest = {sid: (status, msg) for sid, status, msg in rows}
+    cur.exec_driver_sql("update student set status = %s where ID = %s", [(status, sid) for sid, (status, _) in latest.items()])
+    errors = [(msg, sid) for sid, (status, msg) in latest.items() if status == 'error']
+    clears = [(sid,) for sid, (status, _) in latest.items() if status != 'error']
+    if errors:
+        cur.exec_driver_sql("update student set error_msg = %s where ID = %s", errors)
+    if clears:
+        cur.exec_driver_sql("update student set error_msg = NULL where ID = %s", clears)
 if __name__ == "__main__":
     try:
         insert_grades()
@@ -257,16 +257,18 @@ def _load_db_keys_for_franchise(conn: Connection, fid: int) -> Dict[tuple, int]:
         mapping[key] = int(row["id"])
     return mapping
 
-def _fetch_db_row(conn: Connection, student_id: int) -> dict:
-    row = conn.exec_driver_sql("""
-        SELECT grade, portal1, p1Username, p1password,
+def _load_db_rows_for_franchise(conn: Connection, fid: int) -> Dict[int, dict]:
+    """
+    Return { student_id: {tracked columns} } for the franchise in one query,
+    so the diff loop doesn't round-trip per student.
+    """
+    rows = conn.exec_driver_sql("""
+        SELECT id, grade, portal1, p1Username, p1password,
                portal2, p2username, p2password, passwordgood, portal
         FROM Student
-        WHERE id = %s
-    """, (student_id,)).mappings().fetchone()
-    if not row:
-        return {}
-    return dict(row)
+        WHERE franchiseid = %s
+    """, (fid,)).mappings().all()
+    return {int(row["id"]): dict(row) for row in rows}
 
 def _differs(db_row: dict, sheet_row: dict) -> bool:
     """
@@ -337,6 +339,42 @@ def _diff_detail(db_row: dict, sheet_row: dict, *, portal_new: str | None = None
             out.append(("portal", str(portal_old or ""), str(portal_new or "")))
     return out
 
+# ────────────────────────────────────────────────────────────────────────────────
+# Batched writes
+
+_INSERT_STUDENT_SQL = """
+    INSERT INTO Student
+      (franchiseid, firstname, lastname, grade,
+        portal1, p1username, p1password,
+        portal2, p2username, p2password, passwordgood, portal, weeklydata)
+    VALUES
+      (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+_UPDATE_STUDENT_SQL = """
+    UPDATE Student
+    SET grade = %s,
+        portal1 = %s, p1username = %s, p1password = %s,
+        portal2 = %s, p2username = %s, p2password = %s,
+        passwordgood = %s,
+        portal = %s
+    WHERE id = %s
+"""
+
+_DELETE_STUDENT_SQL = """
+    DELETE FROM Student
+    WHERE franchiseid = %s
+      AND LOWER(TRIM(firstname)) = %s
+      AND LOWER(TRIM(lastname))  = %s
+"""
+
+WRITE_BATCH_SIZE = 500
+
+def _executemany(conn, sql: str, params: list[tuple]) -> None:
+    """Send buffered parameter rows in executemany chunks (no-op when empty)."""
+    for i in range(0, len(params), WRITE_BATCH_SIZE):
+        conn.exec_driver_sql(sql, params[i:i + WRITE_BATCH_SIZE])
+
 # ────────────────────────────────────────────────────────────────────────────────
 # Main sync
 
@@ -375,8 +413,12 @@ def sync_students(target_fid: int | None = None, *, debug: bool = False) -> None
         # DB keys (for comparison only)
         with db_conn() as conn:
             db_key_to_id = _load_db_keys_for_franchise(conn, fid)
+            db_rows = _load_db_rows_for_franchise(conn, fid)
 
         inserts = updates = deletes = skips = 0
+        insert_params: list[tuple] = []
+        update_params: list[tuple] = []
+        delete_params: list[tuple] = []
 
         with db_conn() as conn:
             try:
@@ -396,14 +438,7 @@ def sync_students(target_fid: int | None = None, *, debug: bool = False) -> None
                                     f"passwordgood={_safe_preview('passwordgood', sheet_rec.get('passwordgood'))!r} "
                                     f"portal={portal!r}"
                                 )
-                            conn.exec_driver_sql("""
-                                INSERT INTO Student
-                                  (franchiseid, firstname, lastname, grade,
-                                    portal1, p1username, p1password,
-                                    portal2, p2username, p2password, passwordgood, portal, weeklydata)
-                                VALUES
-                                  (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                            """, (
+                            insert_params.append((
                                 fid,
                                 _norm_space(sheet_rec["firstname"]),
                                 _norm_space(sheet_rec["lastname"]),
@@ -421,7 +456,7 @@ def sync_students(target_fid: int | None = None, *, debug: bool = False) -> None
                             inserts += 1
                             continue
 
-                        db_row = _fetch_db_row(conn, sid)
+                        db_row = db_rows.get(sid, {})
                         needs_update = _differs(db_row, sheet_rec)
                         portal_missing = db_row.get("portal") is None or len(db_row["portal"]) == 0
                         if needs_update or portal_missing:
@@ -439,15 +474,7 @@ def sync_students(target_fid: int | None = None, *, debug: bool = False) -> None
                                     f"[UPDATE] FID={fid} id={sid} name={sheet_rec['lastname']}, {sheet_rec['firstname']} "
                                     f"reason={reason} diffs={diff_str}"
                                 )
-                            conn.exec_driver_sql("""
-                                UPDATE Student
-                                SET grade = %s,
-                                    portal1 = %s, p1username = %s, p1password = %s,
-                                    portal2 = %s, p2username = %s, p2password = %s,
-                                    passwordgood = %s,
-                                    portal = %s
-                                WHERE id = %s
-                            """, (
+                            update_params.append((
                                 _norm_space(sheet_rec["grade"]),
                                 _norm_space(sheet_rec["portal1"]),
                                 _norm_space(sheet_rec["p1username"]),
@@ -472,16 +499,16 @@ def sync_students(target_fid: int | None = None, *, debug: bool = False) -> None
                                 sid = db_key_to_id.get(dkey)
                                 _, first, last = dkey
                                 print(f"[DELETE] FID={fid} id={sid} name={last}, {first}")
-                            conn.exec_driver_sql("""
-                                DELETE FROM Student
-                                WHERE franchiseid = %s
-                                  AND LOWER(TRIM(firstname)) = %s
-                                  AND LOWER(TRIM(lastname))  = %s
-                            """, (dkey[0], dkey[1], dkey[2]))
+                            delete_params.append((dkey[0], dkey[1], dkey[2]))
                             deletes += 1
                     else:
                         print(f"[WARN] FID={fid}: Only {parsed_count} rows parsed; skipping DELETE phase.")
 
+                    # One executemany round-trip per statement type, all inside this transaction.
+                    _executemany(conn, _INSERT_STUDENT_SQL, insert_params)
+                    _executemany(conn, _UPDATE_STUDENT_SQL, update_params)
+                    _executemany(conn, _DELETE_STUDENT_SQL, delete_params)
+
             except SQLAlchemyError as e:
                 print(f"[ERROR] FID={fid}: rolled back due to error: {e}")
                 continue
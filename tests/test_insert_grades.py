@@ -31,11 +31,15 @@ class FakeConnection:
         self.committed = True
 
     def exec_driver_sql(self, query, params=None):
+        if isinstance(params, list):  # executemany
+            for row in params:
+                self.exec_driver_sql(query, row)
+            return FakeResult([])
         sql = " ".join(str(query).split()).lower()
         if params is None:
             params = ()
-        if sql.startswith("select weeklydata from student where id = %s"):
-            return FakeResult([{"weeklydata": self.weeklydata}])
+        if sql.startswith("select id, weeklydata from student where id = any(%s)"):
+            return FakeResult([{"id": sid, "weeklydata": self.weeklydata} for sid in params[0]])
         if sql.startswith("update student set weeklydata = %s where id = %s"):
             self.updated_weeklydata = params[0]
             return FakeResult([])
@@ -90,3 +94,78 @@ def test_insert_grades_preserves_historical_weeklydata_when_db_returns_dict(tmp_
     assert saved["2026-03-09"] == {"Math": {"percentage": 88}}
     assert saved["2026-03-16"] == {"Science": {"percentage": 91}}
     assert saved["2026-03-23"] == {"English": {"percentage": 95}}
+
+
+def test_insert_grades_records_status_for_error_and_synced_lines(tmp_path, monkeypatch):
+    grades_path = tmp_path / "grades.jsonl"
+    grades_path.write_text(
+        json.dumps({"db_id": 7, "id": "student-7", "error": "login failed"})
+        + "\n"
+        + json.dumps({"db_id": 8, "id": "student-8", "parsed_grades": {"Math": {"percentage": 90}}})
+        + "\n",
+        encoding="utf-8",
+    )
+
+    fake_conn = FakeConnection({})
+
+    monkeypatch.setattr(insert_grades_module, "JSONL_PATH", grades_path)
+    monkeypatch.setattr(insert_grades_module, "db_conn", lambda: fake_conn)
+    monkeypatch.setattr(insert_grades_module, "get_monday_anchor", lambda: "2026-03-23")
+
+    insert_grades_module.insert_grades()
+
+    assert fake_conn.committed is True
+    assert ("status", ("error", 7)) in fake_conn.status_updates
+    assert ("status", ("synced", 8)) in fake_conn.status_updates
+    assert ("error_msg_set", ("login failed", 7)) in fake_conn.status_updates
+    assert ("error_msg_clear", (8,)) in fake_conn.status_updates
+
+
+def test_insert_grades_keeps_last_status_for_repeated_student(tmp_path, monkeypatch):
+    grades_path = tmp_path / "grades.jsonl"
+    grades_path.write_text(
+        json.dumps({"db_id": 9, "id": "student-9", "parsed_grades": {"Math": {"percentage": 90}}})
+        + "\n"
+        + json.dumps({"db_id": 9, "id": "student-9", "error": "login failed"})
+        + "\n",
+        encoding="utf-8",
+    )
+
+    fake_conn = FakeConnection({})
+
+    monkeypatch.setattr(insert_grades_module, "JSONL_PATH", grades_path)
+    monkeypatch.setattr(insert_grades_module, "db_conn", lambda: fake_conn)
+    monkeypatch.setattr(insert_grades_module, "get_monday_anchor", lambda: "2026-03-23")
+
+    insert_grades_module.insert_grades()
+
+    assert fake_conn.committed is True
+    assert fake_conn.status_updates == [
+        ("status", ("error", 9)),
+        ("error_msg_set", ("login failed", 9)),
+    ]
+
+
+def test_insert_grades_reports_progress_per_written_batch(tmp_path, monkeypatch, capsys):
+    lines = [
+        json.dumps({"db_id": sid, "id": f"student-{sid}", "parsed_grades": {"Math": {"percentage": 90}}})
+        for sid in (1, 2, 2, 3, 4, 5)  # student 2 twice: must not repeat a count
+    ]
+    grades_path = tmp_path / "grades.jsonl"
+    grades_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    fake_conn = FakeConnection({})
+
+    monkeypatch.setattr(insert_grades_module, "JSONL_PATH", grades_path)
+    monkeypatch.setattr(insert_grades_module, "db_conn", lambda: fake_conn)
+    monkeypatch.setattr(insert_grades_module, "get_monday_anchor", lambda: "2026-03-23")
+    monkeypatch.setattr(insert_grades_module, "PROGRESS_EVERY", 2)
+
+    insert_grades_module.insert_grades()
+
+    progress = [line for line in capsys.readouterr().out.splitlines() if line.startswith("...")]
+    assert progress == [
+        "... 2/5 students written",
+        "... 4/5 students written",
+        "... 5/5 students written",
+    ]
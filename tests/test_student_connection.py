@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import pytest
+
+from scraper.portals.student_connection import _grade_from_cell_text
+from scraper.portals.utils import canonicalize_grade
+
+
+def _split_on_paren(text: str) -> str:
+    """The pre-regex parsing: letter before '(' or the percent after it."""
+    parts = text.split("(")
+    return parts[0] if len(parts) < 2 else parts[1]
+
+
+@pytest.mark.parametrize(
+    ("cell_text", "expected"),
+    [
+        ("A (98%)", 98.0),
+        ("(98%)", 98.0),
+        ("B+ (88.5%)", 88.5),
+        ("P (100%)", 100.0),
+        ("CR (85%)", 85.0),
+        ("I (0%)", 0.0),
+    ],
+)
+def test_grade_from_cell_text_prefers_percent(cell_text: str, expected: float) -> None:
+    assert canonicalize_grade(_grade_from_cell_text(cell_text)) == expected
+
+
+@pytest.mark.parametrize(
+    "cell_text",
+    ["CR", "Fail", "A", "B-", "A (98%)", "(98%)", "P (100%)", "CR (85%)", "I (0%)"],
+)
+def test_grade_from_cell_text_matches_previous_parsing(cell_text: str) -> None:
+    assert canonicalize_grade(_grade_from_cell_text(cell_text)) == canonicalize_grade(
+        _split_on_paren(cell_text)
+    )
+
+
+@pytest.mark.parametrize("cell_text", ["CR", "Fail"])
+def test_grade_from_cell_text_does_not_invent_letter_grades(cell_text: str) -> None:
+    assert _grade_from_cell_text(cell_text) == cell_text
+    assert canonicalize_grade(_grade_from_cell_text(cell_text)) is None
@@ -65,14 +65,18 @@ def _extract_candidate(row: dict[str, Any], candidates: tuple[str, ...]) -> Any:
     return None
 
 
-_DRIVER_NAME = "ODBC Driver 17 for SQL Server"
+# Newest registered driver wins; the bundled 17 library is the last resort.
+_DRIVER_NAMES = ("ODBC Driver 18 for SQL Server", "ODBC Driver 17 for SQL Server")
 _DRIVER_PATH = "/home/runner/odbc/lib/libmsodbcsql-17.10.so.6.1"
 
 
 def _resolve_driver() -> str:
     drivers = getattr(pyodbc, "drivers", None)
-    if callable(drivers) and _DRIVER_NAME in drivers():
-        return "{" + _DRIVER_NAME + "}"
+    if callable(drivers):
+        installed = set(drivers())
+        for name in _DRIVER_NAMES:
+            if name in installed:
+                return "{" + name + "}"
     return _DRIVER_PATH
 
 
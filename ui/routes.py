@@ -18,6 +18,7 @@ import db as db
 from db import (
     Student,
     filter_group,
+    group_by,
 )
 from ui.app import (
     clear_login_failures,
@@ -187,9 +188,10 @@ async def health():
     health_info: list[dict] = [] # list of dicts per active franchise with keys: id, active_students, synced_students, errors, last_updated
 
     # count_franchise_students = 0
+    students_by_franchise = group_by(all_students, "franchiseid")
     for franchise in active_franchises:
         fid = franchise["franchiseid"]
-        f_students = filter_group(all_students, "franchiseid", fid)
+        f_students = students_by_franchise.get(fid, [])
         f_health = check_students_status(f_students)
         f_health["id"] = fid
         health_info.append(f_health)